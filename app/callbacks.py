@@ -35,6 +35,7 @@ PREFIX_SUG_DEFER = "sug:defer:"
 
 PREFIX_VIEW_PROJECT = "view:project:"
 PREFIX_PROJ_STEP_TOGGLE = "proj:step:toggle:"
+PREFIX_PROJ_PAGE = "proj:page:"  # proj:page:<project_id>:<page>
 PREFIX_DONE_PAGE = "done:page:"
 PREFIX_DONE_RESTORE = "done:restore:"
 PREFIX_DELETED_PAGE = "deleted:page:"
@@ -4,7 +4,9 @@ Uses Europe/Helsinki timezone for user-facing operations.
 """
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Union
 
 try:
     from zoneinfo import ZoneInfo
@@ -18,6 +20,22 @@ except ImportError:
         _HAS_ZONEINFO = False
 
 
+@lru_cache(maxsize=64)
+def resolve_tz(tz_name: str) -> tzinfo:
+    """
+    Resolve a timezone name once and cache the tzinfo.
+    Fallback (no zoneinfo/tzdata): Europe/Helsinki = UTC+2, muuten UTC.
+    """
+    if _HAS_ZONEINFO:
+        try:
+            return ZoneInfo(tz_name)
+        except Exception:
+            pass
+    if tz_name == "Europe/Helsinki":
+        return timezone(timedelta(hours=2))
+    return timezone.utc
+
+
 class SystemClock:
     """System clock for time operations"""
     
@@ -64,24 +82,14 @@ class SystemClock:
         return datetime.now(SystemClock._get_user_tz())
     
     @staticmethod
-    def now_user_tz(tz_name: str = "Europe/Helsinki") -> datetime:
+    def now_user_tz(tz: Union[str, tzinfo] = "Europe/Helsinki") -> datetime:
         """
-        Get current time in user's timezone.
+        Get current time in user's timezone (name or an already resolved tzinfo).
         Windows: ZoneInfo("Europe/Helsinki") voi epäonnistua ilman tzdata -> fallback UTC+2.
         """
-        if _HAS_ZONEINFO:
-            try:
-                tz = ZoneInfo(tz_name)
-                return datetime.now(tz)
-            except Exception:
-                # Fallback: Europe/Helsinki = UTC+2 (talvi), muuten UTC
-                if tz_name == "Europe/Helsinki":
-                    return datetime.now(timezone(timedelta(hours=2)))
-                return datetime.now(SystemClock._get_utc_tz())
-        else:
-            if tz_name == "Europe/Helsinki":
-                return datetime.now(timezone(timedelta(hours=2)))
-            return datetime.now(SystemClock._get_utc_tz())
+        if isinstance(tz, str):
+            tz = resolve_tz(tz)
+        return datetime.now(tz)
     
     @staticmethod
     def now_helsinki_iso() -> str:
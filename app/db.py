@@ -23,7 +23,7 @@ from app.constants import (
     TASK_STATUS_BACKLOG,
     TASK_STATUS_DROPPED,
 )
-from app.models import Task
+from app.models import EventTaskRow, Task
 from app.priority import parse_priority
 from app.repos.projects_repo import ProjectsRepo
 from app.repos.stats_repo import StatsRepo
@@ -33,6 +33,7 @@ from app.repos.tasks_repo import TasksRepoImpl
 # Re-export for backward compatibility
 __all__ = [
     "Task",
+    "EventTaskRow",
     "TasksRepo",
     "DEFAULT_MORNING_START",
     "DEFAULT_MORNING_END",
@@ -56,6 +57,8 @@ class TasksRepo:
 
     async def init(self) -> None:
         async with aiosqlite.connect(self._db_path) as db:
+            # journal_mode is stored in the db file, so it also covers every per-call connection
+            await db.execute("PRAGMA journal_mode=WAL;")
             await self._tasks.init_tables(db)
             await self._suggestions.init_tables(db)
             await self._stats.init_tables(db)
@@ -75,10 +78,10 @@ class TasksRepo:
     async def count_completed_tasks_today(self, user_id: int) -> int:
         return await self._tasks.count_completed_tasks_today(user_id)
 
-    async def list_done_tasks(self, user_id: int, limit: int = 50, offset: int = 0):
+    async def list_done_tasks(self, user_id: int, limit: int = 50, offset: int = 0) -> list[EventTaskRow]:
         return await self._tasks.list_done_tasks(user_id, limit, offset)
 
-    async def list_deleted_tasks(self, user_id: int, limit: int = 50, offset: int = 0):
+    async def list_deleted_tasks(self, user_id: int, limit: int = 50, offset: int = 0) -> list[EventTaskRow]:
         return await self._tasks.list_deleted_tasks(user_id, limit, offset)
 
     async def add_task(
@@ -214,35 +217,28 @@ class TasksRepo:
         )
         return True
 
+    async def _log_task_edited(self, user_id: int, task_id: int, updated: Optional[dict]) -> bool:
+        """Log ACTION_TASK_EDITED from the row returned by an UPDATE ... RETURNING; False if none."""
+        if not updated:
+            return False
+        clean_title, priority = parse_priority(updated["text"])
+        await self._stats.log_action(
+            user_id=user_id,
+            action=ACTION_TASK_EDITED,
+            task_id=task_id,
+            payload={"new_text": clean_title, "priority": priority},
+        )
+        return True
+
     async def set_deadline(
         self, task_id: int, user_id: int, deadline_utc: str
     ) -> bool:
-        success = await self._tasks.set_deadline(task_id, user_id, deadline_utc)
-        if success:
-            task = await self._tasks.get_task(user_id=user_id, task_id=task_id)
-            if task:
-                clean_title, priority = parse_priority(task.text)
-                await self._stats.log_action(
-                    user_id=user_id,
-                    action=ACTION_TASK_EDITED,
-                    task_id=task_id,
-                    payload={"new_text": clean_title, "priority": priority},
-                )
-        return success
+        updated = await self._tasks.set_deadline(task_id, user_id, deadline_utc)
+        return await self._log_task_edited(user_id, task_id, updated)
 
     async def clear_deadline(self, task_id: int, user_id: int) -> bool:
-        success = await self._tasks.clear_deadline(task_id, user_id)
-        if success:
-            task = await self._tasks.get_task(user_id=user_id, task_id=task_id)
-            if task:
-                clean_title, priority = parse_priority(task.text)
-                await self._stats.log_action(
-                    user_id=user_id,
-                    action=ACTION_TASK_EDITED,
-                    task_id=task_id,
-                    payload={"new_text": clean_title, "priority": priority},
-                )
-        return success
+        updated = await self._tasks.clear_deadline(task_id, user_id)
+        return await self._log_task_edited(user_id, task_id, updated)
 
     async def set_schedule(
         self,
@@ -251,34 +247,14 @@ class TasksRepo:
         schedule_kind: str,
         schedule_payload: dict,
     ) -> bool:
-        success = await self._tasks.set_schedule(
+        updated = await self._tasks.set_schedule(
             task_id, user_id, schedule_kind, schedule_payload
         )
-        if success:
-            task = await self._tasks.get_task(user_id=user_id, task_id=task_id)
-            if task:
-                clean_title, priority = parse_priority(task.text)
-                await self._stats.log_action(
-                    user_id=user_id,
-                    action=ACTION_TASK_EDITED,
-                    task_id=task_id,
-                    payload={"new_text": clean_title, "priority": priority},
-                )
-        return success
+        return await self._log_task_edited(user_id, task_id, updated)
 
     async def clear_schedule(self, task_id: int, user_id: int) -> bool:
-        success = await self._tasks.clear_schedule(task_id, user_id)
-        if success:
-            task = await self._tasks.get_task(user_id=user_id, task_id=task_id)
-            if task:
-                clean_title, priority = parse_priority(task.text)
-                await self._stats.log_action(
-                    user_id=user_id,
-                    action=ACTION_TASK_EDITED,
-                    task_id=task_id,
-                    payload={"new_text": clean_title, "priority": priority},
-                )
-        return success
+        updated = await self._tasks.clear_schedule(task_id, user_id)
+        return await self._log_task_edited(user_id, task_id, updated)
 
     # ---- Suggestion slots (delegate + orchestrate) ----
     async def get_suggestion_slots(self, user_id: int):
@@ -409,18 +385,15 @@ class TasksRepo:
         return await self._stats.get_all_time_stats(user_id)
 
     async def reset_all_data(self, user_id: int) -> None:
-        await self._tasks.delete_user_tasks(user_id)
-        await self._tasks.clear_task_events(user_id)
+        await self._tasks.wipe_user_data(user_id)
         await self._suggestions.clear_suggestion_log(user_id)
         await self._suggestions.clear_user_slots(user_id)
         await self._stats.clear_action_log(user_id)
-        await self._tasks.clear_routine_completions_quitted(user_id)
 
     async def reset_stats(self, user_id: int) -> bool:
-        await self._tasks.clear_task_events(user_id)
+        await self._tasks.wipe_user_data(user_id, keep_tasks=True)
         await self._stats.clear_action_log(user_id)
         await self._suggestions.clear_suggestion_log(user_id)
-        await self._tasks.clear_routine_completions_quitted(user_id)
         return True
 
     # ---- User settings / routines (delegate to _tasks) ----
@@ -489,6 +462,11 @@ class TasksRepo:
             user_id, routine_task_id, completion_date, done
         )
 
+    async def set_routine_completions_bulk(
+        self, user_id: int, items: list[tuple[int, str, bool]]
+    ) -> None:
+        return await self._tasks.set_routine_completions_bulk(user_id, items)
+
     async def get_today_date_user_tz(self, user_id: int) -> str:
         return await self._tasks.get_today_date_user_tz(user_id)
 
@@ -511,6 +489,9 @@ class TasksRepo:
     async def is_in_evening_window(self, user_id: int) -> bool:
         return await self._tasks.is_in_evening_window(user_id)
 
+    async def routine_window_flags(self, user_id: int) -> tuple[bool, bool]:
+        return await self._tasks.routine_window_flags(user_id)
+
     async def ensure_default_routine_tasks(
         self, user_id: int, routine_type: str
     ) -> None:
@@ -120,11 +120,13 @@ async def _get_routine_view_if_active(user_id: int, repo: TasksRepo) -> tuple[st
     evening_enabled = bool(settings.get("evening_routines_enabled") or 0)
     today = await repo.get_today_date_user_tz(user_id)
     tz = settings.get("timezone") or "Europe/Helsinki"
+    in_morning, in_evening = (
+        await repo.routine_window_flags(user_id) if (morning_enabled or evening_enabled) else (False, False)
+    )
 
     if not morning_enabled:
         logging.info(f"[ROUTINE] user_id={user_id} morning: enabled=False (asetus pois tai ei riviä) tz={tz}")
     if morning_enabled:
-        in_morning = await repo.is_in_morning_window(user_id)
         quitted = await repo.get_routine_quitted(user_id, "morning", today)
         logging.info(
             f"[ROUTINE] user_id={user_id} morning: enabled={morning_enabled} in_window={in_morning} quitted={quitted} today={today} tz={tz}"
@@ -139,7 +141,6 @@ async def _get_routine_view_if_active(user_id: int, repo: TasksRepo) -> tuple[st
             return header, kb
 
     if evening_enabled:
-        in_evening = await repo.is_in_evening_window(user_id)
         quitted = await repo.get_routine_quitted(user_id, "evening", today)
         if in_evening and not quitted:
             await repo.ensure_default_routine_tasks(user_id, "evening")
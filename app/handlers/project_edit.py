@@ -4,6 +4,7 @@ Project edit handlers for managing project steps.
 ROUTER MAP:
 - edit:projects - Show list of all projects for editing
 - edit:project:<project_id> - Show project steps edit view
+- edit:step:page:<project_id>:<page> - Show another page of a long project's steps
 - edit:project:rewrite:<project_id> - Start rewriting all project steps
 - edit:step:menu:<step_id> - Show step edit menu
 - edit:step:text:<step_id> - Start editing step text
@@ -25,6 +26,7 @@ from aiogram.types import CallbackQuery, Message
 from app.db import TasksRepo
 from app.handlers.common import CtxKeys, Flow, return_to_main_menu
 from app.ui import (
+    project_step_page,
     project_steps_edit_kb,
     projects_edit_kb,
     render_project_steps_edit_header,
@@ -130,6 +132,32 @@ async def cb_edit_project_steps(cb: CallbackQuery, state: FSMContext, repo: Task
     await cb.answer()
 
 
+@router.callback_query(F.data.startswith("edit:step:page:"))
+async def cb_edit_project_steps_page(cb: CallbackQuery, state: FSMContext, repo: TasksRepo) -> None:
+    """Show another page of a long project's steps edit view (edit:step:page:<project_id>:<page>)"""
+    parts = parse_callback_data(cb.data, 5)
+    project_id = parse_int_safe(parts[3]) if parts else None
+    page = parse_int_safe(parts[4]) if parts else None
+
+    if project_id is None or page is None:
+        await cb.answer("Virheellinen sivu.", show_alert=True)
+        return
+
+    project = await repo.get_project(project_id)
+    if not project:
+        await cb.answer("Projektia ei löytynyt.", show_alert=True)
+        return
+
+    steps = await repo.get_project_steps(project_id)
+
+    if cb.message:
+        await cb.message.edit_text(
+            render_project_steps_edit_header(project, steps),
+            reply_markup=project_steps_edit_kb(project, steps, page=page)
+        )
+    await cb.answer()
+
+
 @router.callback_query(F.data.startswith("edit:step:menu:"))
 async def cb_step_edit_menu(cb: CallbackQuery, state: FSMContext, repo: TasksRepo) -> None:
     """Show step edit menu"""
@@ -161,11 +189,12 @@ async def cb_step_edit_menu(cb: CallbackQuery, state: FSMContext, repo: TasksRep
     step_text = step.get('text', '')
     status = step.get('status', 'pending')
     header = f"Muokkaa askelta\n\n{step_text}\n\nStatus: {status}"
+    page = project_step_page(await repo.get_project_steps(project_id), step_id)
     
     if cb.message:
         await cb.message.edit_text(
             header,
-            reply_markup=step_edit_menu_kb(step, project_id)
+            reply_markup=step_edit_menu_kb(step, project_id, page=page)
         )
     await cb.answer()
 
@@ -233,7 +262,7 @@ async def msg_edit_step_text(message: Message, state: FSMContext, repo: TasksRep
                 
                 await message.answer(
                     render_project_steps_edit_header(project, steps),
-                    reply_markup=project_steps_edit_kb(project, steps)
+                    reply_markup=project_steps_edit_kb(project, steps, page=project_step_page(steps, step_id))
                 )
                 return
     
@@ -257,6 +286,8 @@ async def cb_step_delete(cb: CallbackQuery, state: FSMContext, repo: TasksRepo)
         return
     
     project_id = step.get('project_id', 0)
+    # Page of the step before it is removed; the keyboard clamps it if that page is now empty
+    page = project_step_page(await repo.get_project_steps(project_id), step_id)
     
     # Delete step
     success = await repo.delete_project_step(step_id=step_id)
@@ -269,7 +300,7 @@ async def cb_step_delete(cb: CallbackQuery, state: FSMContext, repo: TasksRepo)
             
             await cb.message.edit_text(
                 render_project_steps_edit_header(project, steps),
-                reply_markup=project_steps_edit_kb(project, steps)
+                reply_markup=project_steps_edit_kb(project, steps, page=page)
             )
             await cb.answer("Askel poistettu")
             return
@@ -301,7 +332,7 @@ async def cb_step_activate(cb: CallbackQuery, state: FSMContext, repo: TasksRepo
                 
                 await cb.message.edit_text(
                     render_project_steps_edit_header(project, steps),
-                    reply_markup=project_steps_edit_kb(project, steps)
+                    reply_markup=project_steps_edit_kb(project, steps, page=project_step_page(steps, step_id))
                 )
                 await cb.answer("Askel aktivoitu")
                 return
@@ -333,7 +364,7 @@ async def cb_step_deactivate(cb: CallbackQuery, state: FSMContext, repo: TasksRe
                 
                 await cb.message.edit_text(
                     render_project_steps_edit_header(project, steps),
-                    reply_markup=project_steps_edit_kb(project, steps)
+                    reply_markup=project_steps_edit_kb(project, steps, page=project_step_page(steps, step_id))
                 )
                 await cb.answer("Askel palautettu odottamaan")
                 return
@@ -366,7 +397,7 @@ async def cb_step_complete(cb: CallbackQuery, state: FSMContext, repo: TasksRepo
                 
                 await cb.message.edit_text(
                     render_project_steps_edit_header(project, steps),
-                    reply_markup=project_steps_edit_kb(project, steps)
+                    reply_markup=project_steps_edit_kb(project, steps, page=project_step_page(steps, step_id))
                 )
                 await cb.answer("Askel merkitty tehdyksi")
                 return
@@ -403,7 +434,7 @@ async def cb_step_move_up(cb: CallbackQuery, state: FSMContext, repo: TasksRepo)
             
             await cb.message.edit_text(
                 render_project_steps_edit_header(project, steps),
-                reply_markup=project_steps_edit_kb(project, steps)
+                reply_markup=project_steps_edit_kb(project, steps, page=project_step_page(steps, step_id))
             )
             await cb.answer("Askel siirretty ylös")
             return
@@ -440,7 +471,7 @@ async def cb_step_move_down(cb: CallbackQuery, state: FSMContext, repo: TasksRep
             
             await cb.message.edit_text(
                 render_project_steps_edit_header(project, steps),
-                reply_markup=project_steps_edit_kb(project, steps)
+                reply_markup=project_steps_edit_kb(project, steps, page=project_step_page(steps, step_id))
             )
             await cb.answer("Askel siirretty alas")
             return
@@ -498,7 +529,7 @@ async def msg_add_step_text(message: Message, state: FSMContext, repo: TasksRepo
             
             await message.answer(
                 render_project_steps_edit_header(project, steps),
-                reply_markup=project_steps_edit_kb(project, steps)
+                reply_markup=project_steps_edit_kb(project, steps, page=project_step_page(steps, step_id))
             )
             return
     
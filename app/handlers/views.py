@@ -29,6 +29,7 @@ from app.callbacks import (
     PREFIX_DELETED_RESTORE,
     PREFIX_DONE_PAGE,
     PREFIX_DONE_RESTORE,
+    PREFIX_PROJ_PAGE,
     PREFIX_PROJ_STEP_TOGGLE,
     PREFIX_ROUTINE_ADD,
     PREFIX_ROUTINE_DEL,
@@ -71,6 +72,7 @@ from app.ui import (
     done_tasks_kb,
     edit_kb,
     project_detail_view_kb,
+    project_step_page,
     projects_list_kb,
     render_edit_header,
     render_project_detail,
@@ -677,7 +679,10 @@ async def cb_routine_toggle(cb: CallbackQuery, state: FSMContext, repo: TasksRep
     completed = await repo.get_routine_completions_for_date(user_id, today)
     new_done = task_id not in completed
     await repo.set_routine_completion(user_id, task_id, today, new_done)
-    completed = await repo.get_routine_completions_for_date(user_id, today)
+    if new_done:
+        completed.add(task_id)
+    else:
+        completed.discard(task_id)
     tasks = await repo.list_routine_tasks(user_id, routine_type)
     all_done = len(tasks) > 0 and len(completed) >= len(tasks)
     if cb.message:
@@ -771,6 +776,28 @@ async def cb_project_detail(cb: CallbackQuery, state: FSMContext, repo: TasksRep
     await cb.answer()
 
 
+@router.callback_query(F.data.startswith(PREFIX_PROJ_PAGE))
+async def cb_project_page(cb: CallbackQuery, state: FSMContext, repo: TasksRepo) -> None:
+    """Show another page of a long project's step buttons (proj:page:<project_id>:<page>)"""
+    parts = parse_callback(cb.data, 4)
+    project_id = parse_int_safe(parts[2]) if parts else None
+    page = parse_int_safe(parts[3]) if parts else None
+    if project_id is None or page is None:
+        await cb.answer("Virheellinen sivu.", show_alert=True)
+        return
+    project = await repo.get_project(project_id)
+    if not project:
+        await cb.answer("Projektia ei löytynyt.", show_alert=True)
+        return
+    steps = await repo.get_project_steps(project_id)
+    if cb.message:
+        await cb.message.edit_text(
+            render_project_detail(project, steps),
+            reply_markup=project_detail_view_kb(project, steps, page=page),
+        )
+    await cb.answer()
+
+
 @router.callback_query(F.data.startswith(PREFIX_PROJ_STEP_TOGGLE))
 async def cb_proj_step_toggle(cb: CallbackQuery, state: FSMContext, repo: TasksRepo) -> None:
     """Toggle project step done/not done and refresh project detail view"""
@@ -794,9 +821,10 @@ async def cb_proj_step_toggle(cb: CallbackQuery, state: FSMContext, repo: TasksR
         await cb.answer("Projektia ei löytynyt.", show_alert=True)
         return
     steps = await repo.get_project_steps(project_id)
+    # Stay on the page of the toggled step
     await cb.message.edit_text(
         render_project_detail(project, steps),
-        reply_markup=project_detail_view_kb(project, steps),
+        reply_markup=project_detail_view_kb(project, steps, page=project_step_page(steps, step_id)),
     )
     action = result.get("action", "completed")
     if action == "completed_project":
@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
-"""Shared data models (Task)."""
+"""Shared data models (Task, EventTaskRow)."""
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import NamedTuple, Optional
 
 
 @dataclass(frozen=True)
@@ -27,3 +27,11 @@ class Task:
     tags: str
     created_at: str
     updated_at: str
+
+
+class EventTaskRow(NamedTuple):
+    """One completed/deleted task event for the done/deleted list views."""
+    event_id: int
+    task_id: Optional[int]
+    title: str
+    updated_at: str
@@ -37,29 +37,19 @@ def parse_priority(text: str) -> tuple[str, int]:
     # Strip leading/trailing whitespace for safe handling
     text = text.strip()
     
-    if not text:
-        return ("", 0)
+    # Fast path: no '!' anywhere (C-level memchr) -> nothing to count or remove
+    if '!' not in text:
+        return (text, 0)
     
-    # Count trailing exclamation marks only (contiguous sequence at the end)
-    # Remove trailing whitespace first to find where the title actually ends
-    text_no_trailing_ws = text.rstrip()
-    
-    # Count contiguous '!' characters at the very end
-    trailing_bangs = 0
-    for char in reversed(text_no_trailing_ws):
-        if char == '!':
-            trailing_bangs += 1
-        else:
-            # Stop at first non-'!' character
-            break
+    # Count contiguous '!' characters at the very end (rstrip scans in C)
+    without_bangs = text.rstrip('!')
+    trailing_bangs = len(text) - len(without_bangs)
     
     # Clamp priority to MAX_PRIORITY
     priority = min(trailing_bangs, MAX_PRIORITY)
     
-    # Remove trailing '!' characters to get clean title
-    clean_title = text_no_trailing_ws[:-trailing_bangs] if trailing_bangs > 0 else text_no_trailing_ws
-    # Strip any remaining trailing whitespace
-    clean_title = clean_title.rstrip()
+    # Strip any remaining trailing whitespace between title and '!'
+    clean_title = without_bangs.rstrip()
     
     return (clean_title, priority)
 
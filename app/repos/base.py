@@ -12,4 +12,5 @@ class BaseRepo:
         self._db_path = db_path
 
     def _now_iso(self) -> str:
+        """UTC isoformat ('+00:00' suffix); readers such as app.suggestions rely on this format."""
         return datetime.now(timezone.utc).isoformat()
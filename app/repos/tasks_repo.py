@@ -3,10 +3,12 @@
 from __future__ import annotations
 
 import json
+import time
 from typing import Optional
 
 import aiosqlite
 
+from app.clock import SystemClock
 from app.constants import (
     TASK_ACTION_COMPLETED,
     TASK_ACTION_DELETED,
@@ -18,11 +20,30 @@ from app.constants import (
     DEFAULT_EVENING_START,
     DEFAULT_EVENING_END,
 )
-from app.models import Task
+from app.models import EventTaskRow, Task
 from app.priority import parse_priority
 from app.repos.base import BaseRepo
 from app.utils import parse_time_string, time_in_window
 
+_DEFAULT_USER_SETTINGS = {
+    "timezone": "Europe/Helsinki",
+    "show_done_in_home": True,
+    "day_start_time": None,
+    "day_end_time": None,
+    "morning_routines_enabled": False,
+    "evening_routines_enabled": False,
+    "morning_start_time": None,
+    "morning_end_time": None,
+    "evening_start_time": None,
+    "evening_end_time": None,
+}
+
+
+def _to_bool(v) -> bool:
+    if v is None:
+        return False
+    return bool(int(v)) if isinstance(v, (int, float)) else bool(v)
+
 
 class TasksRepoImpl(BaseRepo):
     """tasks, task_events, user_settings, user_routine_* tables. No action_log/progress_log."""
@@ -31,6 +52,27 @@ class TasksRepoImpl(BaseRepo):
     ROUTINE_TYPE_EVENING = "evening"
     DEFAULT_MORNING_TASKS = ["Aamupala", "Aamujumppa", "Aamusuihku"]
     DEFAULT_EVENING_TASKS = ["Iltapala", "Iltasuihku", "Iltasatu"]
+    SETTINGS_CACHE_TTL_SECONDS = 60.0
+    QUITTED_CACHE_MAX = 1024
+
+    def __init__(self, db_path: str) -> None:
+        super().__init__(db_path)
+        # user_id -> (monotonic expiry, normalized settings dict)
+        self._settings_cache: dict[int, tuple[float, dict]] = {}
+        # (user_id, routine_type, completion_date) keys known to be quitted; insertion-ordered for eviction
+        self._quitted_cache: dict[tuple[int, str, str], None] = {}
+
+    def _invalidate_settings(self, user_id: int) -> None:
+        self._settings_cache.pop(user_id, None)
+
+    def _forget_quitted(self, user_id: int) -> None:
+        for key in [k for k in self._quitted_cache if k[0] == user_id]:
+            del self._quitted_cache[key]
+
+    def _remember_quitted(self, key: tuple[int, str, str]) -> None:
+        self._quitted_cache[key] = None
+        if len(self._quitted_cache) > self.QUITTED_CACHE_MAX:
+            del self._quitted_cache[next(iter(self._quitted_cache))]
 
     async def init_tables(self, db: aiosqlite.Connection) -> None:
         await db.execute(
@@ -90,6 +132,9 @@ class TasksRepoImpl(BaseRepo):
             """
         )
         await db.execute("CREATE INDEX IF NOT EXISTS idx_task_events_user_id ON task_events(user_id);")
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_task_events_user_action_at ON task_events(user_id, action, at DESC, task_id, text);"
+        )
         await db.execute(
             """
             CREATE TABLE IF NOT EXISTS user_settings (
@@ -146,7 +191,14 @@ class TasksRepoImpl(BaseRepo):
             );
             """
         )
+        urc_cursor = await db.execute("PRAGMA table_info(user_routine_completions)")
+        urc_columns = [row[1] for row in await urc_cursor.fetchall()]
+        if "done" not in urc_columns:
+            await db.execute("ALTER TABLE user_routine_completions ADD COLUMN done INTEGER NOT NULL DEFAULT 1;")
         await db.execute("CREATE INDEX IF NOT EXISTS idx_routine_completions_user_date ON user_routine_completions(user_id, completion_date);")
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_routine_completions_done ON user_routine_completions(user_id, completion_date, routine_task_id) WHERE done = 1;"
+        )
         await db.execute(
             """
             CREATE TABLE IF NOT EXISTS user_routine_quitted (
@@ -198,7 +250,6 @@ class TasksRepoImpl(BaseRepo):
             return [dict(r) for r in await cur.fetchall()]
 
     async def count_completed_tasks_today(self, user_id: int) -> int:
-        from app.clock import SystemClock
         from datetime import timedelta, timezone
         settings = await self.get_user_settings(user_id)
         user_tz_str = settings.get("timezone", "Europe/Helsinki")
@@ -219,23 +270,22 @@ class TasksRepoImpl(BaseRepo):
             row = await cur.fetchone()
             return row["count"] if row else 0
 
-    async def _list_event_tasks(self, user_id: int, action: str, limit: int, offset: int) -> list[dict]:
+    async def _list_event_tasks(self, user_id: int, action: str, limit: int, offset: int) -> list[EventTaskRow]:
         async with aiosqlite.connect(self._db_path) as conn:
-            conn.row_factory = aiosqlite.Row
             cur = await conn.execute(
                 """
-                SELECT e.id as job_id, e.task_id, e.text as title, NULL as due_at, NULL as schedule_kind, NULL as schedule_json, ? as status, e.at as updated_at
+                SELECT e.id, e.task_id, COALESCE(e.text, ''), COALESCE(e.at, '')
                 FROM task_events e
                 WHERE e.user_id = ? AND e.action = ? ORDER BY e.at DESC LIMIT ? OFFSET ?;
                 """,
-                (action, user_id, action, limit, offset),
+                (user_id, action, limit, offset),
             )
-            return [dict(r) for r in await cur.fetchall()]
+            return list(map(EventTaskRow._make, await cur.fetchall()))
 
-    async def list_done_tasks(self, user_id: int, limit: int = 50, offset: int = 0) -> list[dict]:
+    async def list_done_tasks(self, user_id: int, limit: int = 50, offset: int = 0) -> list[EventTaskRow]:
         return await self._list_event_tasks(user_id, TASK_ACTION_COMPLETED, limit, offset)
 
-    async def list_deleted_tasks(self, user_id: int, limit: int = 50, offset: int = 0) -> list[dict]:
+    async def list_deleted_tasks(self, user_id: int, limit: int = 50, offset: int = 0) -> list[EventTaskRow]:
         return await self._list_event_tasks(user_id, TASK_ACTION_DELETED, limit, offset)
 
     async def add_task(
@@ -610,12 +660,12 @@ class TasksRepoImpl(BaseRepo):
                 (user_id, TASK_ACTION_COMPLETED, limit),
             )
             completed = [dict(r) for r in await cur.fetchall()]
+            # Deleted tasks no longer have a tasks row, so the join would only yield NULLs.
             cur = await conn.execute(
                 """
-                SELECT e.id, e.task_id, e.text, e.at, t.deadline, t.schedule_kind, t.schedule_json, t.priority
-                FROM task_events e
-                LEFT JOIN tasks t ON e.task_id = t.id AND e.user_id = t.user_id
-                WHERE e.user_id = ? AND e.action = ? ORDER BY e.at DESC LIMIT ?;
+                SELECT id, task_id, text, at, NULL AS deadline, NULL AS schedule_kind, NULL AS schedule_json, NULL AS priority
+                FROM task_events
+                WHERE user_id = ? AND action = ? ORDER BY at DESC LIMIT ?;
                 """,
                 (user_id, TASK_ACTION_DELETED, limit),
             )
@@ -633,63 +683,60 @@ class TasksRepoImpl(BaseRepo):
         ok = await self._delete_task_row(user_id, task_id)
         return task if ok else None
 
-    async def set_deadline(self, task_id: int, user_id: int, deadline_utc: str) -> bool:
-        now = self._now_iso()
+    _RETURNING_TASK_FIELDS = " RETURNING id, text, priority, deadline, schedule_kind, schedule_json;"
+
+    async def _update_task_returning(self, sql: str, params: tuple) -> Optional[dict]:
+        """Run a single-task UPDATE with RETURNING; the updated fields, or None if no row matched."""
         async with aiosqlite.connect(self._db_path) as conn:
-            cur = await conn.execute(
-                """
-                UPDATE tasks SET deadline = ?, deadline_time = ?, updated_at = ?
-                WHERE id = ? AND user_id = ?;
-                """,
-                (deadline_utc, deadline_utc, now, task_id, user_id),
-            )
+            cur = await conn.execute(sql + self._RETURNING_TASK_FIELDS, params)
+            row = await cur.fetchone()
+            await cur.close()
             await conn.commit()
-            return cur.rowcount > 0
+        if row is None:
+            return None
+        return dict(zip(("id", "text", "priority", "deadline", "schedule_kind", "schedule_json"), row))
 
-    async def clear_deadline(self, task_id: int, user_id: int) -> bool:
+    async def set_deadline(self, task_id: int, user_id: int, deadline_utc: str) -> Optional[dict]:
         now = self._now_iso()
-        async with aiosqlite.connect(self._db_path) as conn:
-            cur = await conn.execute(
-                """
-                UPDATE tasks SET deadline = NULL, deadline_time = NULL, updated_at = ?
-                WHERE id = ? AND user_id = ?;
-                """,
-                (now, task_id, user_id),
-            )
-            await conn.commit()
-            return cur.rowcount > 0
+        return await self._update_task_returning(
+            "UPDATE tasks SET deadline = ?, deadline_time = ?, updated_at = ? WHERE id = ? AND user_id = ?",
+            (deadline_utc, deadline_utc, now, task_id, user_id),
+        )
 
-    async def set_schedule(self, task_id: int, user_id: int, schedule_kind: str, schedule_payload: dict) -> bool:
+    async def clear_deadline(self, task_id: int, user_id: int) -> Optional[dict]:
+        now = self._now_iso()
+        return await self._update_task_returning(
+            "UPDATE tasks SET deadline = NULL, deadline_time = NULL, updated_at = ? WHERE id = ? AND user_id = ?",
+            (now, task_id, user_id),
+        )
+
+    async def set_schedule(self, task_id: int, user_id: int, schedule_kind: str, schedule_payload: dict) -> Optional[dict]:
         now = self._now_iso()
         schedule_json_str = json.dumps(schedule_payload) if schedule_payload else None
         scheduled_time_new = schedule_payload.get("timestamp") if schedule_kind == "at_time" and schedule_payload else None
-        async with aiosqlite.connect(self._db_path) as conn:
-            cur = await conn.execute(
-                """
-                UPDATE tasks SET schedule_kind = ?, schedule_json = ?, scheduled_time_new = ?, updated_at = ?
-                WHERE id = ? AND user_id = ?;
-                """,
-                (schedule_kind, schedule_json_str, scheduled_time_new, now, task_id, user_id),
-            )
-            await conn.commit()
-            return cur.rowcount > 0
+        return await self._update_task_returning(
+            "UPDATE tasks SET schedule_kind = ?, schedule_json = ?, scheduled_time_new = ?, updated_at = ? WHERE id = ? AND user_id = ?",
+            (schedule_kind, schedule_json_str, scheduled_time_new, now, task_id, user_id),
+        )
 
-    async def clear_schedule(self, task_id: int, user_id: int) -> bool:
+    async def clear_schedule(self, task_id: int, user_id: int) -> Optional[dict]:
         now = self._now_iso()
-        async with aiosqlite.connect(self._db_path) as conn:
-            cur = await conn.execute(
-                """
-                UPDATE tasks SET schedule_kind = NULL, schedule_json = NULL, scheduled_time_new = NULL, updated_at = ?
-                WHERE id = ? AND user_id = ?;
-                """,
-                (now, task_id, user_id),
-            )
-            await conn.commit()
-            return cur.rowcount > 0
+        return await self._update_task_returning(
+            "UPDATE tasks SET schedule_kind = NULL, schedule_json = NULL, scheduled_time_new = NULL, updated_at = ? WHERE id = ? AND user_id = ?",
+            (now, task_id, user_id),
+        )
 
     async def get_user_settings(self, user_id: int) -> dict:
+        cached = self._settings_cache.get(user_id)
+        if cached is not None and cached[0] > time.monotonic():
+            return dict(cached[1])
+        settings = await self._load_user_settings(user_id)
+        self._settings_cache[user_id] = (time.monotonic() + self.SETTINGS_CACHE_TTL_SECONDS, settings)
+        return dict(settings)
+
+    async def _load_user_settings(self, user_id: int) -> dict:
+        """Read settings; a user without a row gets the defaults (the row is created lazily by mutators)."""
         async with aiosqlite.connect(self._db_path) as conn:
-            conn.row_factory = aiosqlite.Row
             cur = await conn.execute(
                 """
                 SELECT timezone, show_done_in_home, day_start_time, day_end_time, morning_routines_enabled, evening_routines_enabled,
@@ -699,55 +746,21 @@ class TasksRepoImpl(BaseRepo):
                 (user_id,),
             )
             row = await cur.fetchone()
-            if not row:
-                now = self._now_iso()
-                await conn.execute(
-                    """
-                    INSERT OR IGNORE INTO user_settings (user_id, timezone, show_done_in_home, day_start_time, day_end_time, morning_routines_enabled, evening_routines_enabled, morning_start_time, morning_end_time, evening_start_time, evening_end_time, updated_at)
-                    VALUES (?, 'Europe/Helsinki', 1, NULL, NULL, 0, 0, NULL, NULL, NULL, NULL, ?);
-                    """,
-                    (user_id, now),
-                )
-                await conn.commit()
-                cur = await conn.execute(
-                    """
-                    SELECT timezone, show_done_in_home, day_start_time, day_end_time, morning_routines_enabled, evening_routines_enabled,
-                        morning_start_time, morning_end_time, evening_start_time, evening_end_time
-                    FROM user_settings WHERE user_id = ?;
-                    """,
-                    (user_id,),
-                )
-                row = await cur.fetchone()
-            if row:
-                d = dict(row)
-                def _bool(v):
-                    if v is None:
-                        return False
-                    return bool(int(v)) if isinstance(v, (int, float)) else bool(v)
-                return {
-                    "timezone": d.get("timezone") or "Europe/Helsinki",
-                    "show_done_in_home": _bool(d.get("show_done_in_home")),
-                    "day_start_time": d.get("day_start_time"),
-                    "day_end_time": d.get("day_end_time"),
-                    "morning_routines_enabled": _bool(d.get("morning_routines_enabled")),
-                    "evening_routines_enabled": _bool(d.get("evening_routines_enabled")),
-                    "morning_start_time": d.get("morning_start_time"),
-                    "morning_end_time": d.get("morning_end_time"),
-                    "evening_start_time": d.get("evening_start_time"),
-                    "evening_end_time": d.get("evening_end_time"),
-                }
-            return {
-                "timezone": "Europe/Helsinki",
-                "show_done_in_home": True,
-                "day_start_time": None,
-                "day_end_time": None,
-                "morning_routines_enabled": False,
-                "evening_routines_enabled": False,
-                "morning_start_time": None,
-                "morning_end_time": None,
-                "evening_start_time": None,
-                "evening_end_time": None,
-            }
+        if not row:
+            return dict(_DEFAULT_USER_SETTINGS)
+        tz, show_done, day_start, day_end, morning_on, evening_on, morning_start, morning_end, evening_start, evening_end = row
+        return {
+            "timezone": tz or "Europe/Helsinki",
+            "show_done_in_home": _to_bool(show_done),
+            "day_start_time": day_start,
+            "day_end_time": day_end,
+            "morning_routines_enabled": _to_bool(morning_on),
+            "evening_routines_enabled": _to_bool(evening_on),
+            "morning_start_time": morning_start,
+            "morning_end_time": morning_end,
+            "evening_start_time": evening_start,
+            "evening_end_time": evening_end,
+        }
 
     async def set_user_timezone(self, user_id: int, timezone: str) -> bool:
         now = self._now_iso()
@@ -760,28 +773,30 @@ class TasksRepoImpl(BaseRepo):
                 (user_id, timezone, user_id, user_id, user_id, user_id, user_id, user_id, user_id, user_id, user_id, now),
             )
             await conn.commit()
-            return True
+        self._invalidate_settings(user_id)
+        return True
 
-    async def toggle_show_done_in_home(self, user_id: int) -> bool:
+    async def _toggle_setting(self, user_id: int, column: str, default: int) -> bool:
+        """Flip a boolean user_settings column in one upsert; a missing row starts from default."""
         now = self._now_iso()
         async with aiosqlite.connect(self._db_path) as conn:
-            conn.row_factory = aiosqlite.Row
             cur = await conn.execute(
-                "SELECT show_done_in_home FROM user_settings WHERE user_id = ?;",
-                (user_id,),
-            )
-            row = await cur.fetchone()
-            current_value = bool(row["show_done_in_home"]) if row else True
-            new_value = not current_value
-            await conn.execute(
-                """
-                INSERT OR REPLACE INTO user_settings (user_id, timezone, show_done_in_home, day_start_time, day_end_time, morning_routines_enabled, evening_routines_enabled, morning_start_time, morning_end_time, evening_start_time, evening_end_time, updated_at)
-                VALUES (?, COALESCE((SELECT timezone FROM user_settings WHERE user_id = ?), 'Europe/Helsinki'), ?, (SELECT day_start_time FROM user_settings WHERE user_id = ?), (SELECT day_end_time FROM user_settings WHERE user_id = ?), COALESCE((SELECT morning_routines_enabled FROM user_settings WHERE user_id = ?), 0), COALESCE((SELECT evening_routines_enabled FROM user_settings WHERE user_id = ?), 0), (SELECT morning_start_time FROM user_settings WHERE user_id = ?), (SELECT morning_end_time FROM user_settings WHERE user_id = ?), (SELECT evening_start_time FROM user_settings WHERE user_id = ?), (SELECT evening_end_time FROM user_settings WHERE user_id = ?), ?);
+                f"""
+                INSERT INTO user_settings (user_id, {column}, updated_at)
+                VALUES (?, 1 - ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET {column} = 1 - COALESCE({column}, ?), updated_at = excluded.updated_at
+                RETURNING {column};
                 """,
-                (user_id, user_id, new_value, user_id, user_id, user_id, user_id, user_id, user_id, user_id, user_id, now),
+                (user_id, default, now, default),
             )
+            row = await cur.fetchone()
+            await cur.close()
             await conn.commit()
-            return new_value
+        self._invalidate_settings(user_id)
+        return bool(row[0]) if row else not default
+
+    async def toggle_show_done_in_home(self, user_id: int) -> bool:
+        return await self._toggle_setting(user_id, "show_done_in_home", 1)
 
     async def set_user_time_window(self, user_id: int, day_start_time: Optional[str] = None, day_end_time: Optional[str] = None) -> bool:
         now = self._now_iso()
@@ -798,55 +813,17 @@ class TasksRepoImpl(BaseRepo):
                 (user_id, day_start_time, day_end_time, now, day_start_time, day_end_time, now),
             )
             await conn.commit()
-            return True
+        self._invalidate_settings(user_id)
+        return True
 
     async def toggle_morning_routines_enabled(self, user_id: int) -> bool:
-        now = self._now_iso()
-        async with aiosqlite.connect(self._db_path) as conn:
-            conn.row_factory = aiosqlite.Row
-            cur = await conn.execute(
-                "SELECT morning_routines_enabled FROM user_settings WHERE user_id = ?;",
-                (user_id,),
-            )
-            row = await cur.fetchone()
-            current = bool(row["morning_routines_enabled"]) if row and row["morning_routines_enabled"] is not None else False
-            new_value = not current
-            await conn.execute(
-                """
-                INSERT INTO user_settings (user_id, timezone, show_done_in_home, day_start_time, day_end_time, morning_routines_enabled, evening_routines_enabled, morning_start_time, morning_end_time, evening_start_time, evening_end_time, updated_at)
-                VALUES (?, COALESCE((SELECT timezone FROM user_settings WHERE user_id = ?), 'Europe/Helsinki'), COALESCE((SELECT show_done_in_home FROM user_settings WHERE user_id = ?), 1), (SELECT day_start_time FROM user_settings WHERE user_id = ?), (SELECT day_end_time FROM user_settings WHERE user_id = ?), ?, COALESCE((SELECT evening_routines_enabled FROM user_settings WHERE user_id = ?), 0), (SELECT morning_start_time FROM user_settings WHERE user_id = ?), (SELECT morning_end_time FROM user_settings WHERE user_id = ?), (SELECT evening_start_time FROM user_settings WHERE user_id = ?), (SELECT evening_end_time FROM user_settings WHERE user_id = ?), ?)
-                ON CONFLICT(user_id) DO UPDATE SET morning_routines_enabled = ?, updated_at = ?;
-                """,
-                (user_id, user_id, user_id, user_id, user_id, 1 if new_value else 0, user_id, user_id, user_id, user_id, user_id, now, 1 if new_value else 0, now),
-            )
-            await conn.commit()
-            return new_value
+        return await self._toggle_setting(user_id, "morning_routines_enabled", 0)
 
     async def toggle_evening_routines_enabled(self, user_id: int) -> bool:
-        now = self._now_iso()
-        async with aiosqlite.connect(self._db_path) as conn:
-            conn.row_factory = aiosqlite.Row
-            cur = await conn.execute(
-                "SELECT evening_routines_enabled FROM user_settings WHERE user_id = ?;",
-                (user_id,),
-            )
-            row = await cur.fetchone()
-            current = bool(row["evening_routines_enabled"]) if row and row["evening_routines_enabled"] is not None else False
-            new_value = not current
-            await conn.execute(
-                """
-                INSERT INTO user_settings (user_id, timezone, show_done_in_home, day_start_time, day_end_time, morning_routines_enabled, evening_routines_enabled, morning_start_time, morning_end_time, evening_start_time, evening_end_time, updated_at)
-                VALUES (?, COALESCE((SELECT timezone FROM user_settings WHERE user_id = ?), 'Europe/Helsinki'), COALESCE((SELECT show_done_in_home FROM user_settings WHERE user_id = ?), 1), (SELECT day_start_time FROM user_settings WHERE user_id = ?), (SELECT day_end_time FROM user_settings WHERE user_id = ?), COALESCE((SELECT morning_routines_enabled FROM user_settings WHERE user_id = ?), 0), ?, (SELECT morning_start_time FROM user_settings WHERE user_id = ?), (SELECT morning_end_time FROM user_settings WHERE user_id = ?), (SELECT evening_start_time FROM user_settings WHERE user_id = ?), (SELECT evening_end_time FROM user_settings WHERE user_id = ?), ?)
-                ON CONFLICT(user_id) DO UPDATE SET evening_routines_enabled = ?, updated_at = ?;
-                """,
-                (user_id, user_id, user_id, user_id, user_id, user_id, 1 if new_value else 0, user_id, user_id, user_id, user_id, now, 1 if new_value else 0, now),
-            )
-            await conn.commit()
-            return new_value
+        return await self._toggle_setting(user_id, "evening_routines_enabled", 0)
 
     async def list_routine_tasks(self, user_id: int, routine_type: str) -> list[dict]:
         async with aiosqlite.connect(self._db_path) as conn:
-            conn.row_factory = aiosqlite.Row
             cur = await conn.execute(
                 """
                 SELECT id, text, order_index FROM user_routine_tasks
@@ -855,26 +832,24 @@ class TasksRepoImpl(BaseRepo):
                 (user_id, routine_type),
             )
             rows = await cur.fetchall()
-            return [{"id": r["id"], "text": r["text"], "order_index": r["order_index"]} for r in rows]
+            return [{"id": r[0], "text": r[1], "order_index": r[2]} for r in rows]
 
     async def add_routine_task(self, user_id: int, routine_type: str, text: str) -> int:
         now = self._now_iso()
         async with aiosqlite.connect(self._db_path) as conn:
-            cur = await conn.execute(
-                "SELECT COALESCE(MAX(order_index), -1) + 1 FROM user_routine_tasks WHERE user_id = ? AND routine_type = ?;",
-                (user_id, routine_type),
-            )
-            row = await cur.fetchone()
-            idx = row[0] if row else 0
             cur = await conn.execute(
                 """
                 INSERT INTO user_routine_tasks (user_id, routine_type, order_index, text, created_at)
-                VALUES (?, ?, ?, ?, ?);
+                SELECT ?, ?, COALESCE(MAX(order_index), -1) + 1, ?, ?
+                FROM user_routine_tasks WHERE user_id = ? AND routine_type = ?
+                RETURNING id;
                 """,
-                (user_id, routine_type, idx, text, now),
+                (user_id, routine_type, text, now, user_id, routine_type),
             )
+            row = await cur.fetchone()
+            await cur.close()
             await conn.commit()
-            return int(cur.lastrowid)
+            return int(row[0])
 
     async def update_routine_task(self, user_id: int, routine_task_id: int, new_text: str) -> bool:
         async with aiosqlite.connect(self._db_path) as conn:
@@ -899,33 +874,35 @@ class TasksRepoImpl(BaseRepo):
             cur = await conn.execute(
                 """
                 SELECT routine_task_id FROM user_routine_completions
-                WHERE user_id = ? AND completion_date = ?;
+                WHERE user_id = ? AND completion_date = ? AND done = 1;
                 """,
                 (user_id, completion_date),
             )
-            rows = await cur.fetchall()
-            return {r[0] for r in rows}
+            completed: set[int] = set()
+            async for r in cur:
+                completed.add(r[0])
+            return completed
 
     async def set_routine_completion(self, user_id: int, routine_task_id: int, completion_date: str, done: bool) -> None:
+        await self.set_routine_completions_bulk(user_id, [(routine_task_id, completion_date, done)])
+
+    async def set_routine_completions_bulk(self, user_id: int, items: list[tuple[int, str, bool]]) -> None:
+        """Upsert (routine_task_id, completion_date, done) items on one connection with a single commit."""
+        if not items:
+            return
         now = self._now_iso()
         async with aiosqlite.connect(self._db_path) as conn:
-            if done:
-                await conn.execute(
-                    """
-                    INSERT OR REPLACE INTO user_routine_completions (user_id, routine_task_id, completion_date, done_at)
-                    VALUES (?, ?, ?, ?);
-                    """,
-                    (user_id, routine_task_id, completion_date, now),
-                )
-            else:
-                await conn.execute(
-                    "DELETE FROM user_routine_completions WHERE user_id = ? AND routine_task_id = ? AND completion_date = ?;",
-                    (user_id, routine_task_id, completion_date),
-                )
+            await conn.executemany(
+                """
+                INSERT INTO user_routine_completions (user_id, routine_task_id, completion_date, done_at, done)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(user_id, routine_task_id, completion_date) DO UPDATE SET done = excluded.done, done_at = excluded.done_at;
+                """,
+                [(user_id, task_id, date, now, 1 if done else 0) for task_id, date, done in items],
+            )
             await conn.commit()
 
     async def get_today_date_user_tz(self, user_id: int) -> str:
-        from app.clock import SystemClock
         settings = await self.get_user_settings(user_id)
         tz = settings.get("timezone", "Europe/Helsinki")
         now = SystemClock.now_user_tz(tz)
@@ -941,85 +918,108 @@ class TasksRepoImpl(BaseRepo):
             "timezone": settings.get("timezone") or "Europe/Helsinki",
         }
 
-    async def set_morning_window(self, user_id: int, start: str, end: str) -> bool:
+    async def _set_routine_window(self, user_id: int, prefix: str, start: str, end: str) -> bool:
+        """Validate start < end and upsert {prefix}_start_time/{prefix}_end_time in one statement."""
         start_t = parse_time_string(start)
         end_t = parse_time_string(end)
         if start_t is None or end_t is None:
             return False
         if start_t >= end_t:
             return False
-        await self._ensure_user_settings_row(user_id)
         now = self._now_iso()
         async with aiosqlite.connect(self._db_path) as conn:
             await conn.execute(
-                "UPDATE user_settings SET morning_start_time = ?, morning_end_time = ?, updated_at = ? WHERE user_id = ?;",
-                (start, end, now, user_id),
+                f"""
+                INSERT INTO user_settings (user_id, {prefix}_start_time, {prefix}_end_time, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    {prefix}_start_time = excluded.{prefix}_start_time,
+                    {prefix}_end_time = excluded.{prefix}_end_time,
+                    updated_at = excluded.updated_at;
+                """,
+                (user_id, start, end, now),
             )
             await conn.commit()
-            return True
+        self._invalidate_settings(user_id)
+        return True
 
-    async def set_evening_window(self, user_id: int, start: str, end: str) -> bool:
-        start_t = parse_time_string(start)
-        end_t = parse_time_string(end)
-        if start_t is None or end_t is None:
-            return False
-        if start_t >= end_t:
-            return False
-        await self._ensure_user_settings_row(user_id)
-        now = self._now_iso()
-        async with aiosqlite.connect(self._db_path) as conn:
-            await conn.execute(
-                "UPDATE user_settings SET evening_start_time = ?, evening_end_time = ?, updated_at = ? WHERE user_id = ?;",
-                (start, end, now, user_id),
-            )
-            await conn.commit()
-            return True
+    async def set_morning_window(self, user_id: int, start: str, end: str) -> bool:
+        return await self._set_routine_window(user_id, self.ROUTINE_TYPE_MORNING, start, end)
 
-    async def _ensure_user_settings_row(self, user_id: int) -> None:
-        await self.get_user_settings(user_id)
+    async def set_evening_window(self, user_id: int, start: str, end: str) -> bool:
+        return await self._set_routine_window(user_id, self.ROUTINE_TYPE_EVENING, start, end)
 
     async def is_in_morning_window(self, user_id: int) -> bool:
-        from app.clock import SystemClock
         windows = await self.get_routine_windows(user_id)
         tz = windows.get("timezone", "Europe/Helsinki")
         now = SystemClock.now_user_tz(tz)
         return time_in_window(now.hour, now.minute, windows["morning_start"], windows["morning_end"])
 
     async def is_in_evening_window(self, user_id: int) -> bool:
-        from app.clock import SystemClock
         windows = await self.get_routine_windows(user_id)
         tz = windows.get("timezone", "Europe/Helsinki")
         now = SystemClock.now_user_tz(tz)
         return time_in_window(now.hour, now.minute, windows["evening_start"], windows["evening_end"])
 
+    async def routine_window_flags(self, user_id: int) -> tuple[bool, bool]:
+        """One settings fetch + one clock read: (in_morning, in_evening); both may be True if the windows overlap."""
+        windows = await self.get_routine_windows(user_id)
+        now = SystemClock.now_user_tz(windows["timezone"])
+        return (
+            time_in_window(now.hour, now.minute, windows["morning_start"], windows["morning_end"]),
+            time_in_window(now.hour, now.minute, windows["evening_start"], windows["evening_end"]),
+        )
+
     async def ensure_default_routine_tasks(self, user_id: int, routine_type: str) -> None:
-        tasks = await self.list_routine_tasks(user_id, routine_type)
-        if tasks:
-            return
         defaults = self.DEFAULT_MORNING_TASKS if routine_type == self.ROUTINE_TYPE_MORNING else self.DEFAULT_EVENING_TASKS
-        for i, text in enumerate(defaults):
-            await self.add_routine_task(user_id, routine_type, text)
+        now = self._now_iso()
+        async with aiosqlite.connect(self._db_path) as conn:
+            cur = await conn.execute(
+                "SELECT COUNT(*), COALESCE(MAX(order_index), -1) + 1 FROM user_routine_tasks WHERE user_id = ? AND routine_type = ?;",
+                (user_id, routine_type),
+            )
+            count, base = await cur.fetchone()
+            await cur.close()
+            if count:
+                return
+            await conn.executemany(
+                """
+                INSERT INTO user_routine_tasks (user_id, routine_type, order_index, text, created_at)
+                VALUES (?, ?, ?, ?, ?);
+                """,
+                [(user_id, routine_type, base + i, text, now) for i, text in enumerate(defaults)],
+            )
+            await conn.commit()
 
     async def set_routine_quitted(self, user_id: int, routine_type: str, completion_date: str) -> None:
         now = self._now_iso()
         async with aiosqlite.connect(self._db_path) as conn:
             await conn.execute(
                 """
-                INSERT OR REPLACE INTO user_routine_quitted (user_id, routine_type, completion_date, at)
-                VALUES (?, ?, ?, ?);
+                INSERT INTO user_routine_quitted (user_id, routine_type, completion_date, at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(user_id, routine_type, completion_date) DO UPDATE SET at = excluded.at;
                 """,
                 (user_id, routine_type, completion_date, now),
             )
             await conn.commit()
+        self._remember_quitted((user_id, routine_type, completion_date))
 
     async def get_routine_quitted(self, user_id: int, routine_type: str, completion_date: str) -> bool:
+        key = (user_id, routine_type, completion_date)
+        if key in self._quitted_cache:
+            return True
+        # The primary key (user_id, routine_type, completion_date) covers this lookup.
         async with aiosqlite.connect(self._db_path) as conn:
             cur = await conn.execute(
-                "SELECT 1 FROM user_routine_quitted WHERE user_id = ? AND routine_type = ? AND completion_date = ?;",
+                "SELECT 1 FROM user_routine_quitted WHERE user_id = ? AND routine_type = ? AND completion_date = ? LIMIT 1;",
                 (user_id, routine_type, completion_date),
             )
             row = await cur.fetchone()
-            return row is not None
+        if row is None:
+            return False
+        self._remember_quitted(key)
+        return True
 
     async def clear_task_events(self, user_id: int) -> None:
         async with aiosqlite.connect(self._db_path) as conn:
@@ -1031,6 +1031,23 @@ class TasksRepoImpl(BaseRepo):
             await conn.execute("DELETE FROM user_routine_completions WHERE user_id = ?;", (user_id,))
             await conn.execute("DELETE FROM user_routine_quitted WHERE user_id = ?;", (user_id,))
             await conn.commit()
+        self._forget_quitted(user_id)
+
+    async def wipe_user_data(self, user_id: int, keep_tasks: bool = False) -> None:
+        """Delete the user's tasks (unless keep_tasks), task_events and routine completions/quits in one transaction."""
+        tables = ["task_events", "user_routine_completions", "user_routine_quitted"]
+        if not keep_tasks:
+            tables.insert(0, "tasks")
+        async with aiosqlite.connect(self._db_path, isolation_level=None) as conn:
+            await conn.execute("BEGIN IMMEDIATE;")
+            try:
+                for table in tables:
+                    await conn.execute(f"DELETE FROM {table} WHERE user_id = ?;", (user_id,))
+            except Exception:
+                await conn.execute("ROLLBACK;")
+                raise
+            await conn.execute("COMMIT;")
+        self._forget_quitted(user_id)
 
     async def delete_user_tasks(self, user_id: int) -> None:
         async with aiosqlite.connect(self._db_path) as conn:
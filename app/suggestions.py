@@ -10,8 +10,54 @@ Selects 3-7 tasks from backlog (completed/deleted tasks) based on:
 """
 from __future__ import annotations
 
+import heapq
+import sys
 from datetime import datetime, timezone, timedelta
-from typing import Optional
+from itertools import chain, repeat
+from operator import attrgetter
+from typing import Iterator, NamedTuple, Optional
+
+from app.priority import parse_priority
+
+# Python 3.11+ fromisoformat accepts a trailing 'Z' directly
+_FROMISO_HANDLES_Z = sys.version_info >= (3, 11)
+
+
+def _parse_iso(value: str) -> datetime:
+    return datetime.fromisoformat(value if _FROMISO_HANDLES_Z else value.replace('Z', '+00:00'))
+
+
+_ONE_DAY = timedelta(days=1)
+_by_event_at = attrgetter('event_at')
+_by_score = attrgetter('score')
+
+# Up to this many backlog events select_suggestions sorts in one go instead of using a heap
+SMALL_BACKLOG_SIZE = 128
+
+
+class Candidate(NamedTuple):
+    """Scored suggestion candidate; converted to a dict only for the selected few."""
+    text: str
+    priority: int
+    event_id: Optional[int]
+    event_type: str
+    event_at: str
+    score: float
+
+
+def _parse_event_time(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO event timestamp into an aware UTC datetime, or None if missing/invalid."""
+    # Stored timestamps always start with the year; reject anything else without raising
+    if not value or not value[:1].isdigit():
+        return None
+    try:
+        event_time = _parse_iso(value)
+    except (ValueError, AttributeError, TypeError):
+        return None
+    if event_time.tzinfo is None:
+        # Legacy naive rows only; everything written via BaseRepo._now_iso is aware UTC
+        event_time = event_time.replace(tzinfo=timezone.utc)
+    return event_time
 
 
 def score_suggestion(
@@ -40,46 +86,126 @@ def score_suggestion(
     Returns:
         Score (higher = more relevant for suggestion)
     """
-    score = 0.0
-    
-    # Factor 1: Base priority from '!' (0-5)
-    # Higher priority tasks are more important to resurface
-    score += priority * 10.0
-    
-    # Factor 2: Age (older tasks get higher score for "revisit" value)
-    event_time: Optional[datetime] = None
-    if deleted_at:
-        try:
-            event_time = datetime.fromisoformat(deleted_at.replace('Z', '+00:00'))
-            if event_time.tzinfo is None:
-                event_time = event_time.replace(tzinfo=timezone.utc)
-        except (ValueError, AttributeError):
-            pass
-    elif completed_at:
-        try:
-            event_time = datetime.fromisoformat(completed_at.replace('Z', '+00:00'))
-            if event_time.tzinfo is None:
-                event_time = event_time.replace(tzinfo=timezone.utc)
-        except (ValueError, AttributeError):
-            pass
-    
-    if event_time:
-        days_ago = (now - event_time).total_seconds() / 86400.0
-        # Older tasks (30+ days) get bonus, but very old (365+ days) get less
-        if 30 <= days_ago < 365:
-            score += 5.0 * (days_ago / 30.0)  # Up to ~60 points for 1 year old
-        elif days_ago >= 365:
-            score += 2.0  # Very old tasks get small bonus
+    event_time = _parse_event_time(deleted_at) if deleted_at else _parse_event_time(completed_at)
+    return score_suggestion_dt(
+        priority=priority,
+        event_time=event_time,
+        is_deleted=bool(deleted_at),
+        has_deadline=has_deadline,
+        has_schedule=has_schedule,
+        now=now,
+    )
+
+
+def _age_bonus(event_time: Optional[datetime], now: datetime) -> float:
+    """Age factor: older tasks (30+ days) get a bonus (up to ~60 at 1 year), very old (365+ days) a flat 2."""
+    if not event_time:
+        return 0.0
+    days_ago = (now - event_time) / _ONE_DAY
+    return 2.0 if days_ago >= 365 else (5.0 * (days_ago / 30.0) if days_ago >= 30 else 0.0)
+
+
+def _score(priority: int, age_bonus: float, is_deleted: bool, has_deadline: bool, has_schedule: bool) -> float:
+    # Priority from '!' (0-5) + age ("revisit" value) + missing deadline/schedule metadata
+    # + deleted (user might have deleted by mistake)
+    return (
+        priority * 10.0
+        + age_bonus
+        + (not has_deadline and not has_schedule) * 3.0
+        + bool(is_deleted) * 2.0
+    )
+
+
+def score_suggestion_dt(
+    priority: int,
+    event_time: Optional[datetime],
+    is_deleted: bool,
+    has_deadline: bool,
+    has_schedule: bool,
+    now: datetime,
+) -> float:
+    """
+    Score a task from an already parsed event time (see score_suggestion).
     
-    # Factor 3: Missing metadata (tasks without deadline/schedule might benefit from adding them)
-    if not has_deadline and not has_schedule:
-        score += 3.0
+    Args:
+        priority: Base priority from '!' (0-5)
+        event_time: Aware UTC datetime of the completion/deletion, or None
+        is_deleted: Whether the event is a deletion
+        has_deadline: Whether task had a deadline
+        has_schedule: Whether task had a schedule
+        now: Current datetime in UTC
     
-    # Factor 4: Deleted tasks might be worth revisiting (user might have deleted by mistake)
-    if deleted_at:
-        score += 2.0
+    Returns:
+        Score (higher = more relevant for suggestion)
+    """
+    return _score(priority, _age_bonus(event_time, now), is_deleted, has_deadline, has_schedule)
+
+
+def _iter_candidates(
+    completed_tasks: list[dict],
+    deleted_tasks: list[dict],
+    now: datetime,
+) -> Iterator[Candidate]:
+    """Score backlog events lazily (completed first, then deleted); events without text are skipped."""
+    # Age thresholds as UTC ISO strings for the string fast path below (None if `now` is naive)
+    t30 = t365 = None
+    if now.tzinfo is not None:
+        now_utc = now.astimezone(timezone.utc)
+        t30 = (now_utc - timedelta(days=30)).isoformat()
+        t365 = (now_utc - timedelta(days=365)).isoformat()
+    age_cache: dict[str, float] = {}
     
-    return score
+    for task, event_type in chain(
+        zip(completed_tasks, repeat('completed')),
+        zip(deleted_tasks, repeat('deleted')),
+    ):
+        g = task.get
+        task_text = g('text') or g('title') or ''
+        if not task_text:
+            continue
+        
+        # Use priority from tasks table if available, otherwise parse from text
+        clean_text, parsed_priority = parse_priority(task_text)
+        priority = g('priority')
+        if priority is None:
+            priority = parsed_priority
+        
+        # Check if task had deadline/schedule from tasks table
+        has_deadline = bool(g('deadline'))
+        schedule_kind = g('schedule_kind')
+        has_schedule = bool(schedule_kind) and schedule_kind != 'none'
+        
+        event_at = g('at') or g('updated_at') or ''
+        
+        # Age bonus. Stored timestamps are UTC isoformat ('+00:00'), which sort
+        # lexicographically in chronological order: only the 30-365 day band is parsed.
+        # Parsed bonuses are memoized per timestamp (the same event can appear more than once).
+        if not event_at:
+            age_bonus = 0.0
+        elif t30 is None or not event_at.endswith('+00:00') or t365 <= event_at <= t30:
+            age_bonus = age_cache.get(event_at)
+            if age_bonus is None:
+                age_bonus = age_cache[event_at] = _age_bonus(_parse_event_time(event_at), now)
+        else:
+            age_bonus = 0.0 if event_at > t30 else 2.0
+        
+        score = _score(
+            priority,
+            age_bonus,
+            # Same as score_suggestion(deleted_at=event_at): an empty timestamp gets no deleted bonus
+            event_type == 'deleted' and bool(event_at),
+            has_deadline,
+            has_schedule,
+        )
+        
+        yield Candidate(
+            text=clean_text,  # Store clean text (without '!')
+            priority=priority,
+            event_id=g('id') or g('job_id'),
+            event_type=event_type,
+            event_at=event_at,
+            score=score,
+        )
 
 
 def select_suggestions(
@@ -108,96 +234,23 @@ def select_suggestions(
         - event_at: ISO datetime of event
         - score: Suggestion score
     """
+    if not completed_tasks and not deleted_tasks:
+        return []
+    
     if now is None:
         now = datetime.now(timezone.utc)
     
-    # Combine and score all backlog tasks
-    candidates: list[dict] = []
-    
-    # Process completed tasks
-    for task in completed_tasks:
-        task_text = task.get('text', '') or task.get('title', '')
-        if not task_text:
-            continue
-        
-        # Use priority from tasks table if available, otherwise parse from text
-        from app.priority import parse_priority
-        clean_text, parsed_priority = parse_priority(task_text)
-        priority = task.get('priority')
-        if priority is None:
-            priority = parsed_priority
-        
-        # Check if task had deadline/schedule from tasks table
-        has_deadline = bool(task.get('deadline'))
-        has_schedule = bool(task.get('schedule_kind') and task.get('schedule_kind') != 'none')
-        
-        event_at = task.get('at') or task.get('updated_at', '')
-        
-        score = score_suggestion(
-            task_text=task_text,
-            priority=priority,
-            completed_at=event_at,
-            deleted_at=None,
-            has_deadline=has_deadline,
-            has_schedule=has_schedule,
-            now=now,
-        )
-        
-        candidates.append({
-            'text': clean_text,  # Store clean text (without '!')
-            'priority': priority,
-            'event_id': task.get('id') or task.get('job_id'),
-            'event_type': 'completed',
-            'event_at': event_at,
-            'score': score,
-        })
-    
-    # Process deleted tasks
-    for task in deleted_tasks:
-        task_text = task.get('text', '') or task.get('title', '')
-        if not task_text:
-            continue
-        
-        # Use priority from tasks table if available, otherwise parse from text
-        from app.priority import parse_priority
-        clean_text, parsed_priority = parse_priority(task_text)
-        priority = task.get('priority')
-        if priority is None:
-            priority = parsed_priority
-        
-        # Check if task had deadline/schedule from tasks table
-        has_deadline = bool(task.get('deadline'))
-        has_schedule = bool(task.get('schedule_kind') and task.get('schedule_kind') != 'none')
-        
-        event_at = task.get('at') or task.get('updated_at', '')
-        
-        score = score_suggestion(
-            task_text=task_text,
-            priority=priority,
-            completed_at=None,
-            deleted_at=event_at,
-            has_deadline=has_deadline,
-            has_schedule=has_schedule,
-            now=now,
-        )
-        
-        candidates.append({
-            'text': clean_text,
-            'priority': priority,
-            'event_id': task.get('id') or task.get('job_id'),
-            'event_type': 'deleted',
-            'event_at': event_at,
-            'score': score,
-        })
-    
-    # Sort by score (descending), then by event_at (descending for tie-breaking)
-    candidates.sort(key=lambda x: (-x['score'], x.get('event_at', '')))
-    
-    # Select top suggestions
-    selected = candidates[:max_suggestions]
-    
-    # If we have fewer than min_suggestions, return what we have
-    if len(selected) < min_suggestions:
-        return selected
-    
-    return selected
+    # Top max_suggestions by score (descending), then event_at (ascending) for ties.
+    candidates = _iter_candidates(completed_tasks, deleted_tasks, now)
+    if len(completed_tasks) + len(deleted_tasks) <= SMALL_BACKLOG_SIZE:
+        # Typical call: two stable C-level sorts (event_at asc, then score desc) give the same
+        # order as one sort on (-score, event_at), with attrgetter keys instead of a lambda
+        top = sorted(candidates, key=_by_event_at)
+        top.sort(key=_by_score, reverse=True)
+        del top[max_suggestions:]
+    else:
+        # Large backlog: stream into a bounded heap so only max_suggestions stay alive.
+        # nsmallest == sorted(...)[:n] (stable) without sorting the discarded tail.
+        top = heapq.nsmallest(max_suggestions, candidates, key=lambda c: (-c.score, c.event_at))
+    # Only the selected few become dicts (fewer than min_suggestions is returned as-is)
+    return [c._asdict() for c in top]
@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import islice
+
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from app.db import Task
+from app.callbacks import SETTINGS_TOGGLE_EVENING_ROUTINES, SETTINGS_TOGGLE_MORNING_ROUTINES
+from app.db import EventTaskRow, Task
 from app.priority import render_title_with_priority
 from app.ui_builder import ButtonSpec, build_kb
 
@@ -14,11 +18,26 @@ from app.ui_builder import ButtonSpec, build_kb
 UI_PROJECT_SINGULAR = "Projekti"
 UI_PROJECT_PLURAL = "Projektit"
 UI_ADD_PROJECT = "Lisää projekti"
+_UI_PROJECT_PLURAL_LOWER = UI_PROJECT_PLURAL.lower()
 
 
 def _label(text: str, max_len: int = 48) -> str:
+    # strip() returns the same object when there is nothing to strip; only truncation allocates
     t = text.strip()
-    return t[:max_len] + ("…" if len(t) > max_len else "")
+    if len(t) <= max_len:
+        return t
+    return t[:max_len] + "…"
+
+
+@lru_cache(maxsize=2048)
+def _title_label(text: str, priority: int, max_len: int) -> str:
+    """_label(render_title_with_priority(text, priority), max_len); memoized, titles repeat across renders."""
+    return _label(render_title_with_priority(text, priority), max_len)
+
+
+# Keyboards that depend only on their (hashable) arguments are memoized with lru_cache and
+# the same InlineKeyboardMarkup instance is returned to every caller: never mutate one in place
+# (aiogram markups are not frozen; tests/test_ui_keyboards.py::test_no_in_place_keyboard_mutation guards app/).
 
 
 # DEPRECATED: default_kb() removed - use build_home_keyboard() instead
@@ -27,6 +46,13 @@ def _label(text: str, max_len: int = 48) -> str:
 # render_home_message() -> build_home_keyboard().
 
 
+# Settings toggle labels indexed by the current bool value: (off, on)
+_SHOW_DONE_TOGGLE_TEXT = ("❌ Älä näytä tehtyjä päänäkymässä", "✅ Näytä tehdyt päänäkymässä")
+_MORNING_TOGGLE_TEXT = ("❌ Aamurutiinit pois", "✅ Aamurutiinit päällä")
+_EVENING_TOGGLE_TEXT = ("❌ Iltarutiinit pois", "✅ Iltarutiinit päällä")
+
+
+@lru_cache(maxsize=8)
 def settings_kb(
     show_done: bool = True,
     morning_routines_enabled: bool = False,
@@ -40,112 +66,92 @@ def settings_kb(
         morning_routines_enabled: Current value of morning_routines_enabled
         evening_routines_enabled: Current value of evening_routines_enabled
     """
-    from app.callbacks import (
-        SETTINGS_TOGGLE_MORNING_ROUTINES,
-        SETTINGS_TOGGLE_EVENING_ROUTINES,
-    )
-    toggle_text = "✅ Näytä tehdyt päänäkymässä" if show_done else "❌ Älä näytä tehtyjä päänäkymässä"
-    morning_text = "✅ Aamurutiinit päällä" if morning_routines_enabled else "❌ Aamurutiinit pois"
-    evening_text = "✅ Iltarutiinit päällä" if evening_routines_enabled else "❌ Iltarutiinit pois"
-    return build_kb([
-        [ButtonSpec("Aseta aikavyöhyke", "settings:timezone")],
-        [ButtonSpec(toggle_text, "settings:toggle_show_done")],
-        [ButtonSpec(morning_text, SETTINGS_TOGGLE_MORNING_ROUTINES)],
-        [ButtonSpec(evening_text, SETTINGS_TOGGLE_EVENING_ROUTINES)],
-        [ButtonSpec("Export DB", "settings:export_db")],
-        [ButtonSpec("Takaisin", "home:home")],
-    ])
+    return build_kb((
+        (ButtonSpec("Aseta aikavyöhyke", "settings:timezone"),),
+        (ButtonSpec(_SHOW_DONE_TOGGLE_TEXT[show_done], "settings:toggle_show_done"),),
+        (ButtonSpec(_MORNING_TOGGLE_TEXT[morning_routines_enabled], SETTINGS_TOGGLE_MORNING_ROUTINES),),
+        (ButtonSpec(_EVENING_TOGGLE_TEXT[evening_routines_enabled], SETTINGS_TOGGLE_EVENING_ROUTINES),),
+        (ButtonSpec("Export DB", "settings:export_db"),),
+        (ButtonSpec("Takaisin", "home:home"),),
+    ))
 
 
+@lru_cache(maxsize=None)
 def settings_timezone_kb() -> InlineKeyboardMarkup:
     """Timezone selection keyboard"""
-    kb = InlineKeyboardBuilder()
     # Common timezones
-    kb.row(InlineKeyboardButton(text="Europe/Helsinki", callback_data="settings:tz:Europe/Helsinki"))
-    kb.row(InlineKeyboardButton(text="UTC", callback_data="settings:tz:UTC"))
-    kb.row(InlineKeyboardButton(text="Europe/London", callback_data="settings:tz:Europe/London"))
-    kb.row(InlineKeyboardButton(text="America/New_York", callback_data="settings:tz:America/New_York"))
-    kb.row(InlineKeyboardButton(text="Asia/Tokyo", callback_data="settings:tz:Asia/Tokyo"))
-    kb.row(InlineKeyboardButton(text="Takaisin", callback_data="home:home"))
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="Europe/Helsinki", callback_data="settings:tz:Europe/Helsinki")],
+        [InlineKeyboardButton(text="UTC", callback_data="settings:tz:UTC")],
+        [InlineKeyboardButton(text="Europe/London", callback_data="settings:tz:Europe/London")],
+        [InlineKeyboardButton(text="America/New_York", callback_data="settings:tz:America/New_York")],
+        [InlineKeyboardButton(text="Asia/Tokyo", callback_data="settings:tz:Asia/Tokyo")],
+        [InlineKeyboardButton(text="Takaisin", callback_data="home:home")],
+    ])
 
 
 def edit_kb(tasks: list[Task]) -> InlineKeyboardMarkup:
     """Edit view: list of tasks (click task to open edit menu)"""
-    kb = InlineKeyboardBuilder()
-    
-    for task in tasks:
-        # Render title with priority indicators (!)
-        rendered_title = render_title_with_priority(task.text, task.priority)
-        task_text = _label(rendered_title, 48)
-        
-        # Task title button (opens edit menu)
-        kb.row(
-            InlineKeyboardButton(
-                text=task_text,
-                callback_data=f"task:edit_menu:{task.id}",
-            )
-        )
-    
-    kb.row(InlineKeyboardButton(text="⬅️ Takaisin", callback_data="home:home"))
-    return kb.as_markup()
+    # Task title buttons (with priority indicators) open the edit menu
+    rows = [
+        [InlineKeyboardButton(
+            text=_title_label(task.text, task.priority, 48),
+            callback_data=f"task:edit_menu:{task.id}",
+        )]
+        for task in tasks
+    ]
+    rows.append([InlineKeyboardButton(text="⬅️ Takaisin", callback_data="home:home")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
 def task_action_kb(task: Task) -> InlineKeyboardMarkup:
     """Action menu for a single task: muokkaa, deadline, schedule, poista"""
-    kb = InlineKeyboardBuilder()
-    
-    # Render title with priority indicators
-    rendered_title = render_title_with_priority(task.text, task.priority)
-    
-    # Action buttons
-    kb.row(InlineKeyboardButton(text="✏️ Muokkaa", callback_data=f"task:edit:{task.id}"))
-    kb.row(InlineKeyboardButton(text="⏰ Lisää deadline", callback_data=f"task:deadline:{task.id}"))
-    kb.row(InlineKeyboardButton(text="🗓 Lisää schedule", callback_data=f"task:schedule:{task.id}"))
-    kb.row(InlineKeyboardButton(text="🗑 Poista", callback_data=f"task:del:{task.id}"))
-    kb.row(InlineKeyboardButton(text="⬅️ Takaisin", callback_data="home:home"))
-    
-    return kb.as_markup()
+    return _task_action_kb(task.id)
+
+
+@lru_cache(maxsize=2048)
+def _task_action_kb(task_id: int) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="✏️ Muokkaa", callback_data=f"task:edit:{task_id}")],
+        [InlineKeyboardButton(text="⏰ Lisää deadline", callback_data=f"task:deadline:{task_id}")],
+        [InlineKeyboardButton(text="🗓 Lisää schedule", callback_data=f"task:schedule:{task_id}")],
+        [InlineKeyboardButton(text="🗑 Poista", callback_data=f"task:del:{task_id}")],
+        [InlineKeyboardButton(text="⬅️ Takaisin", callback_data="home:home")],
+    ])
 
 
 def task_edit_menu_kb(task: Task) -> InlineKeyboardMarkup:
     """Edit menu for a task with quick actions"""
-    kb = InlineKeyboardBuilder()
-    
-    # Main actions
-    kb.row(InlineKeyboardButton(text="✏️ Muuta tekstiä", callback_data=f"task:edit_text:{task.id}"))
-    
-    # Priority actions
-    kb.row(
-        InlineKeyboardButton(text="⬆️ Nosta prioriteettia", callback_data=f"task:priority_up:{task.id}"),
-        InlineKeyboardButton(text="⬇️ Laske prioriteettia", callback_data=f"task:priority_down:{task.id}"),
-        width=2,
-    )
-    
-    # Deadline quick actions
-    has_deadline = bool(task.deadline)
+    # Only the id and whether a deadline is set affect the buttons
+    return _task_edit_menu_kb(task.id, bool(task.deadline))
+
+
+@lru_cache(maxsize=2048)
+def _task_edit_menu_kb(task_id: int, has_deadline: bool) -> InlineKeyboardMarkup:
+    rows = [
+        # Main actions
+        [InlineKeyboardButton(text="✏️ Muuta tekstiä", callback_data=f"task:edit_text:{task_id}")],
+        # Priority actions
+        [
+            InlineKeyboardButton(text="⬆️ Nosta prioriteettia", callback_data=f"task:priority_up:{task_id}"),
+            InlineKeyboardButton(text="⬇️ Laske prioriteettia", callback_data=f"task:priority_down:{task_id}"),
+        ],
+        # Deadline quick actions
+        [
+            InlineKeyboardButton(text="⏰ DL +1h", callback_data=f"task:dl_plus1h:{task_id}"),
+            InlineKeyboardButton(text="⏰ DL +24h", callback_data=f"task:dl_plus24h:{task_id}"),
+        ],
+    ]
     if has_deadline:
-        kb.row(
-            InlineKeyboardButton(text="⏰ DL +1h", callback_data=f"task:dl_plus1h:{task.id}"),
-            InlineKeyboardButton(text="⏰ DL +24h", callback_data=f"task:dl_plus24h:{task.id}"),
-            width=2,
-        )
-        kb.row(InlineKeyboardButton(text="❌ Poista DL", callback_data=f"task:dl_remove:{task.id}"))
-    else:
-        kb.row(
-            InlineKeyboardButton(text="⏰ DL +1h", callback_data=f"task:dl_plus1h:{task.id}"),
-            InlineKeyboardButton(text="⏰ DL +24h", callback_data=f"task:dl_plus24h:{task.id}"),
-            width=2,
-        )
+        rows.append([InlineKeyboardButton(text="❌ Poista DL", callback_data=f"task:dl_remove:{task_id}")])
     
     # Delete action
-    kb.row(InlineKeyboardButton(text="🗑 Poista", callback_data=f"task:del:{task.id}"))
-    
-    kb.row(InlineKeyboardButton(text="⬅️ Takaisin", callback_data="home:home"))
-    
-    return kb.as_markup()
+    rows.append([InlineKeyboardButton(text="🗑 Poista", callback_data=f"task:del:{task_id}")])
+    rows.append([InlineKeyboardButton(text="⬅️ Takaisin", callback_data="home:home")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
+@lru_cache(maxsize=None)
 def stats_menu_kb() -> InlineKeyboardMarkup:
     """
     Stats main menu: all time stats, AI analysis, reset stats.
@@ -157,52 +163,54 @@ def stats_menu_kb() -> InlineKeyboardMarkup:
     - stats:reset -> show reset confirmation
     - view:home -> return to home
     """
-    return build_kb([
-        [ButtonSpec("Stats all time", "stats:all_time")],
-        [ButtonSpec("AI-analyysi", "stats:ai")],
-        [ButtonSpec("Reset stats", "stats:reset")],
-        [ButtonSpec("Takaisin", "home:home")],
-    ])
+    return build_kb((
+        (ButtonSpec("Stats all time", "stats:all_time"),),
+        (ButtonSpec("AI-analyysi", "stats:ai"),),
+        (ButtonSpec("Reset stats", "stats:reset"),),
+        (ButtonSpec("Takaisin", "home:home"),),
+    ))
 
 
+@lru_cache(maxsize=None)
 def stats_kb() -> InlineKeyboardMarkup:
     """Statistics view: analysis buttons and back (legacy, kept for compatibility)"""
-    kb = InlineKeyboardBuilder()
-    kb.row(
-        InlineKeyboardButton(text="analyysi 1vko", callback_data="stats:7"),
-        InlineKeyboardButton(text="analyysi 1kk", callback_data="stats:30"),
-        width=2,
-    )
-    kb.row(
-        InlineKeyboardButton(text="analyysi 3kk", callback_data="stats:90"),
-        InlineKeyboardButton(text="analyysi 6kk", callback_data="stats:180"),
-        width=2,
-    )
-    kb.row(InlineKeyboardButton(text="analyysi 1v", callback_data="stats:365"))
-    kb.row(InlineKeyboardButton(text="takaisin", callback_data="home:home"))
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="analyysi 1vko", callback_data="stats:7"),
+            InlineKeyboardButton(text="analyysi 1kk", callback_data="stats:30"),
+        ],
+        [
+            InlineKeyboardButton(text="analyysi 3kk", callback_data="stats:90"),
+            InlineKeyboardButton(text="analyysi 6kk", callback_data="stats:180"),
+        ],
+        [InlineKeyboardButton(text="analyysi 1v", callback_data="stats:365")],
+        [InlineKeyboardButton(text="takaisin", callback_data="home:home")],
+    ])
 
 
+@lru_cache(maxsize=None)
 def stats_ai_period_kb() -> InlineKeyboardMarkup:
     """AI analysis period selection"""
-    kb = InlineKeyboardBuilder()
-    kb.row(InlineKeyboardButton(text="1 pv", callback_data="stats:ai:1"))
-    kb.row(InlineKeyboardButton(text="1 vk", callback_data="stats:ai:7"))
-    kb.row(InlineKeyboardButton(text="1 kk", callback_data="stats:ai:30"))
-    kb.row(InlineKeyboardButton(text="1 v", callback_data="stats:ai:365"))
-    kb.row(InlineKeyboardButton(text="Muu", callback_data="stats:ai:custom"))
-    kb.row(InlineKeyboardButton(text="Takaisin", callback_data="home:home"))
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="1 pv", callback_data="stats:ai:1")],
+        [InlineKeyboardButton(text="1 vk", callback_data="stats:ai:7")],
+        [InlineKeyboardButton(text="1 kk", callback_data="stats:ai:30")],
+        [InlineKeyboardButton(text="1 v", callback_data="stats:ai:365")],
+        [InlineKeyboardButton(text="Muu", callback_data="stats:ai:custom")],
+        [InlineKeyboardButton(text="Takaisin", callback_data="home:home")],
+    ])
 
 
+@lru_cache(maxsize=None)
 def stats_reset_confirm_kb() -> InlineKeyboardMarkup:
     """Reset stats confirmation"""
-    kb = InlineKeyboardBuilder()
-    kb.row(InlineKeyboardButton(text="Varmista reset", callback_data="stats:reset_confirm"))
-    kb.row(InlineKeyboardButton(text="Peru", callback_data="view:stats"))
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="Varmista reset", callback_data="stats:reset_confirm")],
+        [InlineKeyboardButton(text="Peru", callback_data="view:stats")],
+    ])
 
 
+@lru_cache(maxsize=None)
 def plus_menu_kb() -> InlineKeyboardMarkup:
     """
     Plus menu: main options for adding tasks/projects or editing.
@@ -240,13 +248,14 @@ def plus_menu_kb() -> InlineKeyboardMarkup:
     Note: "vapaa viesti = uusi tehtävä" only works when user is NOT in any FSM state.
     When in FSM state (waiting_new_task_text, waiting_deadline_text, etc.), text is treated as input.
     """
-    kb = InlineKeyboardBuilder()
-    kb.row(InlineKeyboardButton(text="Lisää tehtävä", callback_data="add:task_type"))
-    kb.row(InlineKeyboardButton(text="Muokkaa tehtäviä", callback_data="home:edit"))
-    kb.row(InlineKeyboardButton(text="Takaisin", callback_data="home:home"))
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="Lisää tehtävä", callback_data="add:task_type")],
+        [InlineKeyboardButton(text="Muokkaa tehtäviä", callback_data="home:edit")],
+        [InlineKeyboardButton(text="Takaisin", callback_data="home:home")],
+    ])
 
 
+@lru_cache(maxsize=None)
 def add_task_type_kb() -> InlineKeyboardMarkup:
     """
     Task type selection submenu (from plus menu).
@@ -259,60 +268,76 @@ def add_task_type_kb() -> InlineKeyboardMarkup:
     - home:plus -> back to plus menu
     - view:home -> return to home
     """
-    kb = InlineKeyboardBuilder()
-    kb.row(InlineKeyboardButton(text="Regular", callback_data="add:regular"))
-    kb.row(InlineKeyboardButton(text="Ajastettu", callback_data="add:scheduled"))
-    kb.row(InlineKeyboardButton(text="Deadline", callback_data="add:deadline"))
-    kb.row(InlineKeyboardButton(text="Takaisin", callback_data="home:home"))
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="Regular", callback_data="add:regular")],
+        [InlineKeyboardButton(text="Ajastettu", callback_data="add:scheduled")],
+        [InlineKeyboardButton(text="Deadline", callback_data="add:deadline")],
+        [InlineKeyboardButton(text="Takaisin", callback_data="home:home")],
+    ])
 
 
+@lru_cache(maxsize=None)
 def add_task_difficulty_kb() -> InlineKeyboardMarkup:
     """Add task: difficulty selection"""
-    kb = InlineKeyboardBuilder()
-    kb.row(
-        InlineKeyboardButton(text="1%", callback_data="add:difficulty:1"),
-        InlineKeyboardButton(text="5%", callback_data="add:difficulty:5"),
-        InlineKeyboardButton(text="10%", callback_data="add:difficulty:10"),
-        width=3,
-    )
-    kb.row(InlineKeyboardButton(text="muu %", callback_data="add:difficulty:custom"))
-    kb.row(InlineKeyboardButton(text="takaisin", callback_data="home:home"))
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="1%", callback_data="add:difficulty:1"),
+            InlineKeyboardButton(text="5%", callback_data="add:difficulty:5"),
+            InlineKeyboardButton(text="10%", callback_data="add:difficulty:10"),
+        ],
+        [InlineKeyboardButton(text="muu %", callback_data="add:difficulty:custom")],
+        [InlineKeyboardButton(text="takaisin", callback_data="home:home")],
+    ])
 
 
+@lru_cache(maxsize=None)
 def add_task_category_kb() -> InlineKeyboardMarkup:
     """Add task: category selection"""
-    kb = InlineKeyboardBuilder()
-    kb.row(
-        InlineKeyboardButton(text="liikunta", callback_data="add:category:liikunta"),
-        InlineKeyboardButton(text="arki", callback_data="add:category:arki"),
-        width=2,
-    )
-    kb.row(
-        InlineKeyboardButton(text="opiskelu", callback_data="add:category:opiskelu"),
-        InlineKeyboardButton(text="suhteet", callback_data="add:category:suhteet"),
-        width=2,
-    )
-    kb.row(
-        InlineKeyboardButton(text="muu", callback_data="add:category:muu"),
-        InlineKeyboardButton(text="skip", callback_data="add:category:"),
-        width=2,
-    )
-    kb.row(InlineKeyboardButton(text="takaisin", callback_data="home:home"))
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="liikunta", callback_data="add:category:liikunta"),
+            InlineKeyboardButton(text="arki", callback_data="add:category:arki"),
+        ],
+        [
+            InlineKeyboardButton(text="opiskelu", callback_data="add:category:opiskelu"),
+            InlineKeyboardButton(text="suhteet", callback_data="add:category:suhteet"),
+        ],
+        [
+            InlineKeyboardButton(text="muu", callback_data="add:category:muu"),
+            InlineKeyboardButton(text="skip", callback_data="add:category:"),
+        ],
+        [InlineKeyboardButton(text="takaisin", callback_data="home:home")],
+    ])
+
+
+# All 11 bar shapes (0..10 parts filled), indexed by progress // 10
+_PROGRESS_BARS = tuple("█" * filled + "░" * (10 - filled) for filled in range(11))
 
 
 def render_progress_bar(progress_percent: int) -> str:
     """
     Render progress bar: 10 parts, fills 10% at a time.
-    Progress percent can be > 100%, but bar is capped at 100%.
+    Progress percent (>= 0) can be > 100%, but bar is capped at 100%.
     """
     # Bar is always max 100%, but show actual percentage in text
-    bar_percent = min(progress_percent, 100)
-    filled = min(bar_percent // 10, 10)
-    empty = 10 - filled
-    return "█" * filled + "░" * empty + f" {progress_percent}%"
+    return f"{_PROGRESS_BARS[min(progress_percent, 100) // 10]} {progress_percent}%"
+
+
+# Home view instructions (UTF-8, emojis for nav)
+_HOME_INSTRUCTIONS = (
+    "Uusi viesti = uusi tehtävä\n"
+    "! viestin lopussa = +1 prioriteetti\n"
+    "Klikkaa tehtävää = valmis\n"
+    "➕ lisää/muokkaa\n"
+    "📊 tilastot\n"
+    "⚙️ asetukset\n"
+    "📋 projektit\n"
+    "🔄 päivitä lista\n"
+    "✅ viimeisin tehty tehtävä\n"
+    "▶ aktiivinen tehtävä\n"
+    "💡 ehdotukset"
+)
+_HOME_INSTRUCTIONS_REFRESH = _HOME_INSTRUCTIONS + "\u200b"  # Zero-width space
 
 
 # DEPRECATED: render_default_header() removed - use render_home_text() instead
@@ -332,8 +357,8 @@ def render_home_text(
     
     Args:
         completed_count: Number of completed tasks
-        active_count: Number of active tasks
-        active_steps: List of active project steps (each has total_steps, order_index)
+        active_count: Number of active tasks (unused; kept for callers)
+        active_steps: List of active project steps (unused; kept for callers)
         force_refresh: Whether to add invisible character for force refresh
     
     Returns:
@@ -341,34 +366,22 @@ def render_home_text(
     """
     # Calculate progress: 1 completed task = 10%
     # Progress can exceed 100%, but bar is capped at 100%
-    progress_percent = completed_count * 10
-    
-    # Build progress bar
-    progress_bar = render_progress_bar(progress_percent)
-    
-    # Build instructions (UTF-8, emojis for nav)
-    instructions = (
-        "Uusi viesti = uusi tehtävä\n"
-        "! viestin lopussa = +1 prioriteetti\n"
-        "Klikkaa tehtävää = valmis\n"
-        "➕ lisää/muokkaa\n"
-        "📊 tilastot\n"
-        "⚙️ asetukset\n"
-        "📋 projektit\n"
-        "🔄 päivitä lista\n"
-        "✅ viimeisin tehty tehtävä\n"
-        "▶ aktiivinen tehtävä\n"
-        "💡 ehdotukset"
-    )
-    
-    # Combine
-    text = f"{progress_bar}\n\n{instructions}"
-    
-    # Add invisible character for force refresh if needed
-    if force_refresh:
-        text += "\u200b"  # Zero-width space
-    
-    return text
+    # Zero-width space at the end forces Telegram to accept an otherwise identical edit
+    instructions = _HOME_INSTRUCTIONS_REFRESH if force_refresh else _HOME_INSTRUCTIONS
+    return f"{render_progress_bar(completed_count * 10)}\n\n{instructions}"
+
+
+# Bottom navigation row shared by the home keyboards: + | stats | settings | projektit | refresh
+_MAIN_MENU_ROW = (
+    ButtonSpec("➕", "home:plus"),
+    ButtonSpec("📊", "view:stats"),
+    ButtonSpec("⚙️", "view:settings"),
+    ButtonSpec("📋", "view:projects"),
+    ButtonSpec("🔄", "home:refresh"),
+)
+_MENU_ROW_BUTTONS = tuple(
+    InlineKeyboardButton(text=b.text, callback_data=b.callback_data) for b in _MAIN_MENU_ROW
+)
 
 
 def build_home_keyboard(
@@ -377,25 +390,18 @@ def build_home_keyboard(
     active_steps: list[dict],
 ) -> InlineKeyboardMarkup:
     """Legacy: done (1) → active (▶) → Projektit + nav. Prefer build_main_keyboard_6_3 for main view."""
-    kb = InlineKeyboardBuilder()
+    rows: list[list[InlineKeyboardButton]] = []
     # 1) Done tasks (1 most recent)
-    for comp_task in completed_tasks[:1]:
+    if completed_tasks:
+        comp_task = completed_tasks[0]
         task_text = _label(comp_task.get("text", ""), 47)
-        kb.row(InlineKeyboardButton(text=f"✓ {task_text}", callback_data=f"completed:restore:{comp_task.get('id')}"))
+        rows.append([InlineKeyboardButton(text=f"✓ {task_text}", callback_data=f"completed:restore:{comp_task.get('id')}")])
     # 2) Active tasks (▶ prefix)
     for task in active_tasks:
-        rendered_title = render_title_with_priority(task.text, task.priority)
-        kb.row(InlineKeyboardButton(text=f"▶ {_label(rendered_title, 46)}", callback_data=f"t:{task.id}"))
-    kb.row(InlineKeyboardButton(text="📋 Projektit", callback_data="view:projects"))
-    kb.row(
-        InlineKeyboardButton(text="➕", callback_data="home:plus"),
-        InlineKeyboardButton(text="📊", callback_data="view:stats"),
-        InlineKeyboardButton(text="⚙️", callback_data="view:settings"),
-        InlineKeyboardButton(text="📋", callback_data="view:projects"),
-        InlineKeyboardButton(text="🔄", callback_data="home:refresh"),
-        width=5,
-    )
-    return kb.as_markup()
+        rows.append([InlineKeyboardButton(text=f"▶ {_title_label(task.text, task.priority, 46)}", callback_data=f"t:{task.id}")])
+    rows.append([InlineKeyboardButton(text="📋 Projektit", callback_data="view:projects")])
+    rows.append(list(_MENU_ROW_BUTTONS))
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
 def build_main_keyboard_6_3(
@@ -407,44 +413,36 @@ def build_main_keyboard_6_3(
     Default view: done (1) → active (▶) → suggestions (💡) → one menu row. Total 1 + 9 task rows.
     One button per task row. Menu: + | 📊 | ⚙️ | 🔄 | 📋
     """
-    rows: list[list[ButtonSpec]] = []
+    rows: list[tuple[ButtonSpec, ...]] = []
     # 1) Done tasks (1 most recent)
-    for comp_task in completed_tasks[:1]:
+    if completed_tasks:
+        comp_task = completed_tasks[0]
         task_text = _label(comp_task.get("text", ""), 47)
-        rows.append([ButtonSpec(f"✓ {task_text}", f"completed:restore:{comp_task.get('id')}")])
+        rows.append((ButtonSpec(f"✓ {task_text}", f"completed:restore:{comp_task.get('id')}"),))
     # 2) Active tasks (▶ prefix; click = mark done), max 9
-    for task in active_tasks[:9]:
-        rendered_title = render_title_with_priority(task.text, task.priority)
-        rows.append([ButtonSpec(f"▶ {_label(rendered_title, 46)}", f"t:{task.id}")])
+    for task in islice(active_tasks, 9):
+        rows.append((ButtonSpec(f"▶ {_title_label(task.text, task.priority, 46)}", f"t:{task.id}"),))
     # 3) Suggestion rows (💡 prefix; click = set active); no placeholder for empty slots
     for task in suggestion_tasks:
         if task is None:
             continue
-        rendered_title = render_title_with_priority(task.text, task.priority)
-        rows.append([ButtonSpec(f"💡 {_label(rendered_title, 46)}", f"sug:active:{task.id}")])
+        rows.append((ButtonSpec(f"💡 {_title_label(task.text, task.priority, 46)}", f"sug:active:{task.id}"),))
     # 4) One menu row: + | stats | settings | projektit | refresh
-    rows.append([
-        ButtonSpec("➕", "home:plus"),
-        ButtonSpec("📊", "view:stats"),
-        ButtonSpec("⚙️", "view:settings"),
-        ButtonSpec("📋", "view:projects"),
-        ButtonSpec("🔄", "home:refresh"),
-    ])
+    rows.append(_MAIN_MENU_ROW)
     row_widths = [None] * (len(rows) - 1) + [5]
     return build_kb(rows, row_widths)
 
 
 def render_active_card_text(task: Task) -> str:
     """Text for the separate Active task card message."""
-    title = render_title_with_priority(task.text, task.priority)
-    return f"▶ Aktiivinen tehtävä\n\n{_label(title, 200)}"
+    return f"▶ Aktiivinen tehtävä\n\n{_title_label(task.text, task.priority, 200)}"
 
 
 def active_card_kb(task: Task) -> InlineKeyboardMarkup:
     """Single button: Mark done (moves to done list, clears active)."""
-    kb = InlineKeyboardBuilder()
-    kb.row(InlineKeyboardButton(text="✓ Merkitse tehdyksi", callback_data=f"t:{task.id}"))
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="✓ Merkitse tehdyksi", callback_data=f"t:{task.id}")],
+    ])
 
 
 def render_settings_header(settings: dict) -> str:
@@ -457,11 +455,7 @@ def render_settings_header(settings: dict) -> str:
     timezone = settings.get('timezone', 'Europe/Helsinki')
     show_done = settings.get('show_done_in_home', True)
     
-    lines = ["⚙️ Asetukset", ""]
-    lines.append(f"🌍 Aikavyöhyke: {timezone}")
-    lines.append(f"✅ Näytä tehdyt: {'Kyllä' if show_done else 'Ei'}")
-    
-    return "\n".join(lines)
+    return f"⚙️ Asetukset\n\n🌍 Aikavyöhyke: {timezone}\n✅ Näytä tehdyt: {'Kyllä' if show_done else 'Ei'}"
 
 
 def render_timezone_selection_header() -> str:
@@ -488,24 +482,26 @@ def render_task_edit_menu_header(task: Task) -> str:
     rendered_title = render_title_with_priority(task.text, task.priority)
     deadline_info = ""
     if task.deadline:
-        from app.ui import _format_task_date
         deadline_info = f"\n⏰ Määräaika: {_format_task_date(task.deadline)}"
     return f"Muokkaa tehtävää\n\n{rendered_title}{deadline_info}\n\nValitse toiminto:"
 
 
+_STATS_PERIOD_LABELS: dict[int, str] = {
+    7: "1 viikko",
+    30: "1 kuukausi",
+    90: "3 kuukautta",
+    180: "6 kuukautta",
+    365: "1 vuosi",
+}
+
+
 def render_stats_header(stats: dict) -> str:
     days = stats.get('days', 0)
     completed = stats.get('completed', 0)
     deleted = stats.get('deleted', 0)
     active = stats.get('active', 0)
     
-    period = {
-        7: "1 viikko",
-        30: "1 kuukausi",
-        90: "3 kuukautta",
-        180: "6 kuukautta",
-        365: "1 vuosi"
-    }.get(days, f"{days} päivää")
+    period = _STATS_PERIOD_LABELS.get(days) or f"{days} päivää"
     
     return f"Tilastot - {period}\n\n✅ Tehty: {completed}\n❌ Poistettu: {deleted}\n📋 Aktiivisia: {active}"
 
@@ -523,11 +519,13 @@ def render_all_time_stats(stats: dict) -> str:
         stats: Dict with keys: completed_count, active_count, deleted_count, cancelled_count,
               done_today (optional), done_this_week (optional)
     """
-    lines = ["📊 Tilastot - Kaikki ajat", ""]
-    
-    lines.append(f"✅ Tehty: {stats.get('completed_count', 0)}")
-    lines.append(f"📋 Aktiivisia: {stats.get('active_count', 0)}")
-    lines.append(f"❌ Poistettu: {stats.get('deleted_count', 0)}")
+    lines = [
+        "📊 Tilastot - Kaikki ajat",
+        "",
+        f"✅ Tehty: {stats.get('completed_count', 0)}",
+        f"📋 Aktiivisia: {stats.get('active_count', 0)}",
+        f"❌ Poistettu: {stats.get('deleted_count', 0)}",
+    ]
     
     # Cancelled count (for projects)
     cancelled = stats.get('cancelled_count', 0)
@@ -597,31 +595,33 @@ def render_add_category_header() -> str:
 
 def date_picker_kb(prefix: str, include_none: bool = True) -> InlineKeyboardMarkup:
     """Date picker keyboard for deadline/schedule selection."""
-    from datetime import datetime, timedelta, timezone
-    
-    kb = InlineKeyboardBuilder()
+    # Labels only depend on the (UTC) calendar day, so the keyboard is shared until midnight
+    return _date_picker_kb(prefix, include_none, datetime.now(timezone.utc).toordinal())
+
+
+@lru_cache(maxsize=16)
+def _date_picker_kb(prefix: str, include_none: bool, today_ordinal: int) -> InlineKeyboardMarkup:
+    rows: list[list[InlineKeyboardButton]] = []
     
     if include_none:
-        kb.row(InlineKeyboardButton(text="Ei määräaikaa", callback_data=f"{prefix}:none"))
+        rows.append([InlineKeyboardButton(text="Ei määräaikaa", callback_data=f"{prefix}:none")])
     
-    kb.row(
+    rows.append([
         InlineKeyboardButton(text="Tänään", callback_data=f"{prefix}:0"),
         InlineKeyboardButton(text="Huomenna", callback_data=f"{prefix}:1"),
-        width=2,
-    )
+    ])
     
-    now = datetime.now(timezone.utc)
-    for i in range(2, 9):
-        date = now + timedelta(days=i)
-        kb.row(InlineKeyboardButton(
-            text=f"{date.strftime('%a')} {date.day}",
-            callback_data=f"{prefix}:{i}"
-        ))
+    # One row per day, 2..8 days ahead
+    rows.extend(
+        [InlineKeyboardButton(text=f"{day.strftime('%a')} {day.day}", callback_data=f"{prefix}:{i}")]
+        for i, day in enumerate(map(date.fromordinal, range(today_ordinal + 2, today_ordinal + 9)), start=2)
+    )
     
-    kb.row(InlineKeyboardButton(text="⬅️ Takaisin", callback_data="home:home"))
-    return kb.as_markup()
+    rows.append([InlineKeyboardButton(text="⬅️ Takaisin", callback_data="home:home")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
+@lru_cache(maxsize=16)
 def time_picker_kb(prefix: str) -> InlineKeyboardMarkup:
     """
     Time picker keyboard with preset times and custom option.
@@ -629,113 +629,98 @@ def time_picker_kb(prefix: str) -> InlineKeyboardMarkup:
     Args:
         prefix: Callback data prefix (e.g., "deadline:time" or "schedule:time")
     """
-    kb = InlineKeyboardBuilder()
-    
-    kb.row(
-        InlineKeyboardButton(text="09:00", callback_data=f"{prefix}:09:00"),
-        InlineKeyboardButton(text="12:00", callback_data=f"{prefix}:12:00"),
-        width=2,
-    )
-    kb.row(
-        InlineKeyboardButton(text="18:00", callback_data=f"{prefix}:18:00"),
-        InlineKeyboardButton(text="21:00", callback_data=f"{prefix}:21:00"),
-        width=2,
-    )
-    kb.row(InlineKeyboardButton(text="Muu aika", callback_data=f"{prefix}:custom"))
-    kb.row(InlineKeyboardButton(text="⬅️ Takaisin", callback_data=f"{prefix}:back"))
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [
+            InlineKeyboardButton(text="09:00", callback_data=f"{prefix}:09:00"),
+            InlineKeyboardButton(text="12:00", callback_data=f"{prefix}:12:00"),
+        ],
+        [
+            InlineKeyboardButton(text="18:00", callback_data=f"{prefix}:18:00"),
+            InlineKeyboardButton(text="21:00", callback_data=f"{prefix}:21:00"),
+        ],
+        [InlineKeyboardButton(text="Muu aika", callback_data=f"{prefix}:custom")],
+        [InlineKeyboardButton(text="⬅️ Takaisin", callback_data=f"{prefix}:back")],
+    ])
 
 
+@lru_cache(maxsize=None)
 def schedule_type_kb() -> InlineKeyboardMarkup:
     """Schedule type selection keyboard."""
-    kb = InlineKeyboardBuilder()
-    
-    kb.row(InlineKeyboardButton(text="Ei aikataulua", callback_data="schedule:type:none"))
-    kb.row(InlineKeyboardButton(text="Tietty aika", callback_data="schedule:type:at_time"))
-    kb.row(InlineKeyboardButton(text="Aikaväli", callback_data="schedule:type:time_range"))
-    kb.row(InlineKeyboardButton(text="Koko päivä", callback_data="schedule:type:all_day"))
-    kb.row(InlineKeyboardButton(text="⬅️ Takaisin", callback_data="home:home"))
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="Ei aikataulua", callback_data="schedule:type:none")],
+        [InlineKeyboardButton(text="Tietty aika", callback_data="schedule:type:at_time")],
+        [InlineKeyboardButton(text="Aikaväli", callback_data="schedule:type:time_range")],
+        [InlineKeyboardButton(text="Koko päivä", callback_data="schedule:type:all_day")],
+        [InlineKeyboardButton(text="⬅️ Takaisin", callback_data="home:home")],
+    ])
 
 
+@lru_cache(maxsize=4096)
 def _format_task_date(iso_str: str) -> str:
-    """Format ISO datetime string to readable format."""
+    """Format ISO datetime string to readable format (memoized: list rows repeat across renders)."""
     if not iso_str:
         return ""
     try:
-        from datetime import datetime
         dt = datetime.fromisoformat(iso_str.replace('Z', '+00:00'))
         return dt.strftime("%Y-%m-%d %H:%M")
     except (ValueError, AttributeError):
         return iso_str[:10] if len(iso_str) >= 10 else iso_str
 
 
-def done_tasks_kb(tasks: list[dict], offset: int = 0) -> InlineKeyboardMarkup:
+def done_tasks_kb(tasks: list[EventTaskRow], offset: int = 0) -> InlineKeyboardMarkup:
     """Done tasks view keyboard with restore buttons and pagination."""
-    kb = InlineKeyboardBuilder()
+    rows: list[list[InlineKeyboardButton]] = []
     
     for task in tasks:
-        task_text = _label(task.get('title', ''), 48)
-        date_str = _format_task_date(task.get('updated_at', ''))
+        task_text = _label(task.title, 48)
+        date_str = _format_task_date(task.updated_at)
         display_text = f"✓ {task_text}" + (f" ({date_str})" if date_str else "")
         
-        event_id = task.get('job_id')  # event_id from task_events
-        if event_id:
-            # Clicking task restores it to active
-            kb.row(InlineKeyboardButton(text=display_text, callback_data=f"done:restore:{event_id}"))
-        else:
-            # Fallback if no event_id
-            kb.row(InlineKeyboardButton(text=display_text, callback_data="noop"))
+        # Clicking task restores it to active (event_id is the task_events primary key, always set)
+        rows.append([InlineKeyboardButton(text=display_text, callback_data=f"done:restore:{task.event_id}")])
     
     if len(tasks) >= 50:
-        kb.row(InlineKeyboardButton(text="📄 Näytä lisää", callback_data=f"done:page:{offset + 50}"))
+        rows.append([InlineKeyboardButton(text="📄 Näytä lisää", callback_data=f"done:page:{offset + 50}")])
     
-    kb.row(InlineKeyboardButton(text="⬅️ Takaisin tehtäviin", callback_data="home:home"))
-    return kb.as_markup()
+    rows.append([InlineKeyboardButton(text="⬅️ Takaisin tehtäviin", callback_data="home:home")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-def deleted_tasks_kb(tasks: list[dict], offset: int = 0) -> InlineKeyboardMarkup:
+def deleted_tasks_kb(tasks: list[EventTaskRow], offset: int = 0) -> InlineKeyboardMarkup:
     """Deleted tasks view keyboard with restore buttons and pagination."""
-    kb = InlineKeyboardBuilder()
+    rows: list[list[InlineKeyboardButton]] = []
     
     for task in tasks:
-        task_text = _label(task.get('title', ''), 35)
-        event_id = task.get('job_id')
-        date_str = _format_task_date(task.get('updated_at', ''))
+        task_text = _label(task.title, 35)
+        date_str = _format_task_date(task.updated_at)
         display_text = f"🗑 {task_text}" + (f" ({date_str})" if date_str else "")
         
-        callback = f"deleted:restore:{event_id}" if event_id else "noop"
-        kb.row(InlineKeyboardButton(text=display_text, callback_data=callback))
+        rows.append([InlineKeyboardButton(text=display_text, callback_data=f"deleted:restore:{task.event_id}")])
     
     if len(tasks) >= 50:
-        kb.row(InlineKeyboardButton(text="📄 Näytä lisää", callback_data=f"deleted:page:{offset + 50}"))
+        rows.append([InlineKeyboardButton(text="📄 Näytä lisää", callback_data=f"deleted:page:{offset + 50}")])
     
-    kb.row(InlineKeyboardButton(text="⬅️ Takaisin tehtäviin", callback_data="home:home"))
-    return kb.as_markup()
+    rows.append([InlineKeyboardButton(text="⬅️ Takaisin tehtäviin", callback_data="home:home")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
 def suggestions_kb(suggestions: list[dict]) -> InlineKeyboardMarkup:
     """Suggestions view keyboard with accept/snooze buttons"""
-    kb = InlineKeyboardBuilder()
+    rows: list[list[InlineKeyboardButton]] = []
     
     for suggestion in suggestions:
-        task_text = _label(suggestion.get('text', ''), 40)
-        priority = suggestion.get('priority', 0)
-        
-        # Render with priority indicators
-        rendered_title = render_title_with_priority(task_text, priority)
-        display_text = _label(rendered_title, 40)
-        
         # Row: task title (non-clickable display) + action buttons
         event_id = suggestion.get('event_id')
         if event_id:
-            kb.row(
+            # Truncate once, after the priority markers are added
+            display_text = _title_label(suggestion.get('text', ''), suggestion.get('priority', 0), 40)
+            rows.append([
                 InlineKeyboardButton(
                     text=display_text,
                     callback_data="noop"  # Display only
                 )
-            )
-            kb.row(
+            ])
+            rows.append([
                 InlineKeyboardButton(
                     text="✅ Lisää tehtävälistaan",
                     callback_data=f"suggestion:accept:{event_id}"
@@ -744,16 +729,15 @@ def suggestions_kb(suggestions: list[dict]) -> InlineKeyboardMarkup:
                     text="⏸ Snooze",
                     callback_data=f"suggestion:snooze:{event_id}"
                 ),
-                width=2,
-            )
+            ])
     
-    kb.row(InlineKeyboardButton(text="⬅️ Takaisin", callback_data="home:home"))
-    return kb.as_markup()
+    rows.append([InlineKeyboardButton(text="⬅️ Takaisin", callback_data="home:home")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
 def render_suggestions_header(count: int) -> str:
     """Render suggestions view header"""
-    return f"💡 Ehdotukset\n\n{count} ehdotusta {UI_PROJECT_PLURAL.lower()}sta.\n\nValitse 'Lisää tehtävälistaan' lisätäksesi tehtävän takaisin listalle."
+    return f"💡 Ehdotukset\n\n{count} ehdotusta {_UI_PROJECT_PLURAL_LOWER}sta.\n\nValitse 'Lisää tehtävälistaan' lisätäksesi tehtävän takaisin listalle."
 
 
 def render_projects_list_header() -> str:
@@ -765,71 +749,144 @@ def render_projects_list_header() -> str:
     )
 
 
+def _project_rows_key(projects: list[dict]) -> tuple[tuple[int, str, str], ...]:
+    """Hashable (id, status, title) per project: everything the project list keyboards render."""
+    return tuple(
+        (project.get("id", 0), project.get("status", "active"), project.get("title", "Untitled"))
+        for project in projects
+    )
+
+
+# Project status -> list icon; anything else (active) shows 📋
+_PROJECT_STATUS_ICONS = {"completed": "✅", "cancelled": "❌"}
+
+
+def _project_button_text(status: str, title: str) -> str:
+    return f"{_PROJECT_STATUS_ICONS.get(status, '📋')} {_label(title, 45)}"
+
+
 def projects_list_kb(projects: list[dict]) -> InlineKeyboardMarkup:
     """Projects list: Tee projekti, then project buttons, then Asetukset + Takaisin"""
-    kb = InlineKeyboardBuilder()
-    kb.row(InlineKeyboardButton(text="➕ " + UI_ADD_PROJECT, callback_data="add:project"))
-    for project in projects:
-        title = project.get("title", "Untitled")
-        status = project.get("status", "active")
-        if status == "completed":
-            status_icon = "✅"
-        elif status == "cancelled":
-            status_icon = "❌"
-        else:
-            status_icon = "📋"
-        project_text = f"{status_icon} {_label(title, 45)}"
-        project_id = project.get("id", 0)
-        kb.row(
+    return _projects_list_kb(_project_rows_key(projects))
+
+
+@lru_cache(maxsize=512)
+def _projects_list_kb(project_rows: tuple[tuple[int, str, str], ...]) -> InlineKeyboardMarkup:
+    rows = [[InlineKeyboardButton(text="➕ " + UI_ADD_PROJECT, callback_data="add:project")]]
+    for project_id, status, title in project_rows:
+        rows.append([
             InlineKeyboardButton(
-                text=project_text,
+                text=_project_button_text(status, title),
                 callback_data=f"view:project:{project_id}",
             )
-        )
-    kb.row(
+        ])
+    rows.append([
         InlineKeyboardButton(text="⚙️ Asetukset", callback_data="edit:projects"),
         InlineKeyboardButton(text="⬅️ Takaisin", callback_data="home:home"),
-        width=2,
-    )
-    return kb.as_markup()
+    ])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
 def _project_completion_ranks(steps: list[dict]) -> dict[int, int]:
-    """Return step_id -> completion_rank (1-based) for completed steps, by done_at order."""
-    completed = [(s.get("id"), s.get("done_at") or "") for s in steps if s.get("status") == "completed"]
-    completed.sort(key=lambda x: x[1])
-    return {step_id: rank for rank, (step_id, _) in enumerate(completed, start=1)}
+    """Return step_id -> completion_rank (1-based) for completed steps, by done_at order.
+    The dict is cached and shared between callers: read it, never modify it."""
+    return _completion_ranks(
+        tuple([(s.get("id"), s.get("done_at") or "") for s in steps if s.get("status") == "completed"])
+    )
 
 
-def project_detail_view_kb(project: dict, steps: list[dict]) -> InlineKeyboardMarkup:
-    """Project detail view: each step as button (toggle done), back to project list.
-    Undone steps: plain text. Done steps: ✅ and completion order number."""
-    kb = InlineKeyboardBuilder()
+@lru_cache(maxsize=256)
+def _completion_ranks(completed: tuple[tuple[int, str], ...]) -> dict[int, int]:
+    # Steps come back in order_index order, so the done_at sort cannot be skipped
+    return {step_id: rank for rank, (step_id, _) in enumerate(sorted(completed, key=lambda x: x[1]), start=1)}
+
+
+def _step_rows_key(steps: list[dict]) -> tuple[tuple[int, str, int | None], ...]:
+    """Hashable (id, text, completion rank or None) per step: everything the step keyboards render."""
     ranks = _project_completion_ranks(steps)
+    key = []
     for step in steps:
         step_id = step.get("id", 0)
-        step_text = step.get("text", "")
-        status = step.get("status", "pending")
-        if status == "completed":
-            rank = ranks.get(step_id, 0)
-            step_display = f"✅ {rank}. {_label(step_text, 40)}"
-        else:
-            step_display = _label(step_text, 40)
-        kb.row(
-            InlineKeyboardButton(
-                text=step_display,
-                callback_data=f"proj:step:toggle:{step_id}",
-            )
-        )
-    kb.row(InlineKeyboardButton(text="⬅️ Takaisin", callback_data="view:projects"))
-    return kb.as_markup()
+        rank = ranks.get(step_id, 0) if step.get("status", "pending") == "completed" else None
+        key.append((step_id, step.get("text", ""), rank))
+    return tuple(key)
+
+
+def _step_button_text(text: str, rank: int | None) -> str:
+    """Undone steps: plain text. Done steps: ✅ and completion order number."""
+    if rank is None:
+        return _label(text, 40)
+    return f"✅ {rank}. {_label(text, 40)}"
+
+
+# Step buttons per page in the project step keyboards (Telegram caps a keyboard at 100 buttons)
+PROJECT_STEPS_PAGE_SIZE = 20
 
 
+def project_step_page(steps: list[dict], step_id: int) -> int:
+    """Step keyboard page (0-based) that shows step_id; 0 if the step is not in the list."""
+    for index, step in enumerate(steps):
+        if step.get("id") == step_id:
+            return index // PROJECT_STEPS_PAGE_SIZE
+    return 0
+
+
+def _step_rows_page(
+    steps: list[dict], page: int
+) -> tuple[tuple[tuple[int, str, int | None], ...], int, int]:
+    """(step rows on the page, clamped page, page count) for the paged step keyboards."""
+    step_rows = _step_rows_key(steps)
+    page_count = max(1, -(-len(step_rows) // PROJECT_STEPS_PAGE_SIZE))
+    page = min(max(page, 0), page_count - 1)
+    start = page * PROJECT_STEPS_PAGE_SIZE
+    return step_rows[start:start + PROJECT_STEPS_PAGE_SIZE], page, page_count
+
+
+def _step_page_nav(prefix: str, page: int, page_count: int) -> list[InlineKeyboardButton]:
+    """'◀️ Edelliset | n/m | Seuraavat ▶️' row; prefix is the callback up to the page number."""
+    nav: list[InlineKeyboardButton] = []
+    if page > 0:
+        nav.append(InlineKeyboardButton(text="◀️ Edelliset", callback_data=f"{prefix}{page - 1}"))
+    nav.append(InlineKeyboardButton(text=f"{page + 1}/{page_count}", callback_data="noop"))
+    if page + 1 < page_count:
+        nav.append(InlineKeyboardButton(text="Seuraavat ▶️", callback_data=f"{prefix}{page + 1}"))
+    return nav
+
+
+def project_detail_view_kb(project: dict, steps: list[dict], page: int = 0) -> InlineKeyboardMarkup:
+    """Project detail view: each step as button (toggle done), back to project list.
+    Undone steps: plain text. Done steps: ✅ and completion order number.
+    Long projects are shown PROJECT_STEPS_PAGE_SIZE steps at a time with prev/next buttons."""
+    step_rows, page, page_count = _step_rows_page(steps, page)
+    return _project_detail_view_kb(project.get("id", 0), step_rows, page, page_count)
+
+
+@lru_cache(maxsize=512)
+def _project_detail_view_kb(
+    project_id: int,
+    step_rows: tuple[tuple[int, str, int | None], ...],
+    page: int,
+    page_count: int,
+) -> InlineKeyboardMarkup:
+    rows = [
+        [InlineKeyboardButton(
+            text=_step_button_text(text, rank),
+            callback_data=f"proj:step:toggle:{step_id}",
+        )]
+        for step_id, text, rank in step_rows
+    ]
+    if page_count > 1:
+        rows.append(_step_page_nav(f"proj:page:{project_id}:", page, page_count))
+    rows.append([InlineKeyboardButton(text="⬅️ Takaisin", callback_data="view:projects")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+@lru_cache(maxsize=None)
 def project_detail_kb() -> InlineKeyboardMarkup:
     """Project detail view keyboard with back button (legacy)"""
-    kb = InlineKeyboardBuilder()
-    kb.row(InlineKeyboardButton(text="⬅️ Takaisin listaan", callback_data="view:projects"))
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="⬅️ Takaisin listaan", callback_data="view:projects")],
+    ])
 
 
 def render_project_detail(project: dict, steps: list[dict]) -> str:
@@ -845,35 +902,36 @@ def render_project_detail(project: dict, steps: list[dict]) -> str:
     """
     project_title = project.get('title', 'Unknown Project')
     
-    # Count steps by status
+    # Only the completed count is shown (Edistyminen: done/total)
     total_steps = len(steps)
     completed_count = sum(1 for s in steps if s.get('status') == 'completed')
-    active_count = sum(1 for s in steps if s.get('status') == 'active')
-    pending_count = sum(1 for s in steps if s.get('status') == 'pending')
-    
-    # Build header
-    lines = [f"📋 {project_title}", ""]
-    
-    # Progress summary
-    lines.append(f"Edistyminen: {completed_count}/{total_steps}")
-    lines.append("")
     
     # Completion order for done steps (by done_at)
     ranks = _project_completion_ranks(steps)
-    # List all steps: undone = plain text, done = ✅ and completion number
-    for step in steps:
-        step_text = step.get('text', '')
-        status = step.get('status', 'pending')
-        step_id = step.get('id', 0)
-        if status == 'completed':
-            rank = ranks.get(step_id, 0)
-            lines.append(f"✅ {rank}. {step_text}")
-        else:
-            lines.append(step_text)
+    # Header + progress summary, then all steps: undone = plain text, done = ✅ and completion number
+    lines = [f"📋 {project_title}", "", f"Edistyminen: {completed_count}/{total_steps}", ""]
+    lines += [
+        f"✅ {ranks.get(step.get('id', 0), 0)}. {step.get('text', '')}"
+        if step.get('status', 'pending') == 'completed'
+        else step.get('text', '')
+        for step in steps
+    ]
     
     return "\n".join(lines)
 
 
+def _format_duration(duration: timedelta) -> str:
+    """Two most significant units: 'N päivää [N tuntia]', 'N tuntia [N minuuttia]' or 'N minuuttia'."""
+    days = duration.days
+    hours, remainder = divmod(duration.seconds, 3600)
+    minutes = remainder // 60
+    if days > 0:
+        return f"{days} päivää {hours} tuntia" if hours else f"{days} päivää"
+    if hours:
+        return f"{hours} tuntia {minutes} minuuttia" if minutes else f"{hours} tuntia"
+    return f"{minutes} minuuttia"
+
+
 def render_project_completion_summary(project: dict, steps: list[dict]) -> str:
     """
     Render completion summary when a project is finished.
@@ -885,59 +943,38 @@ def render_project_completion_summary(project: dict, steps: list[dict]) -> str:
     Returns:
         Formatted text with project completion summary
     """
-    from datetime import datetime
-    
     project_title = project.get('title', 'Unknown Project')
     created_at = project.get('created_at')
     completed_at = project.get('completed_at')
     total_steps = len(steps)
     
-    lines = [f"✅ {project_title} valmis", ""]
+    # Parse completed_at once: used for both the duration and the completion timestamp
+    completed_dt: datetime | None = None
+    if completed_at:
+        try:
+            completed_dt = datetime.fromisoformat(completed_at.replace('Z', '+00:00'))
+        except (ValueError, AttributeError):
+            pass
     
     # Calculate duration
     if created_at and completed_at:
         try:
+            if completed_dt is None:
+                raise ValueError(completed_at)
             created_dt = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-            completed_dt = datetime.fromisoformat(completed_at.replace('Z', '+00:00'))
-            duration = completed_dt - created_dt
-            
-            # Format duration nicely
-            days = duration.days
-            hours, remainder = divmod(duration.seconds, 3600)
-            minutes, _ = divmod(remainder, 60)
-            
-            if days > 0:
-                duration_str = f"{days} päivää"
-                if hours > 0:
-                    duration_str += f" {hours} tuntia"
-            elif hours > 0:
-                duration_str = f"{hours} tuntia"
-                if minutes > 0:
-                    duration_str += f" {minutes} minuuttia"
-            else:
-                duration_str = f"{minutes} minuuttia"
-            
-            lines.append(f"Kesto: {duration_str}")
+            duration_str = _format_duration(completed_dt - created_dt)
         except (ValueError, AttributeError):
             # Fallback if date parsing fails
-            lines.append("Kesto: laskettu")
+            duration_str = "laskettu"
     else:
-        lines.append("Kesto: ei saatavilla")
-    
-    # Steps count
-    lines.append(f"Askeleita: {total_steps}")
+        duration_str = "ei saatavilla"
     
     # Completion timestamp (optional, as requested)
-    if completed_at:
-        try:
-            completed_dt = datetime.fromisoformat(completed_at.replace('Z', '+00:00'))
-            # Format as readable date/time
-            formatted_time = completed_dt.strftime("%Y-%m-%d %H:%M")
-            lines.append(f"Valmistunut: {formatted_time}")
-        except (ValueError, AttributeError):
-            pass
+    completed_line = ""
+    if completed_dt is not None:
+        completed_line = f"\nValmistunut: {completed_dt.strftime('%Y-%m-%d %H:%M')}"
     
-    return "\n".join(lines)
+    return f"✅ {project_title} valmis\n\nKesto: {duration_str}\nAskeleita: {total_steps}{completed_line}"
 
 
 def render_projects_edit_header() -> str:
@@ -946,74 +983,63 @@ def render_projects_edit_header() -> str:
 
 def projects_edit_kb(projects: list[dict]) -> InlineKeyboardMarkup:
     """Edit view: list of projects (click project to edit steps)"""
-    kb = InlineKeyboardBuilder()
-    
-    for project in projects:
-        title = project.get('title', 'Untitled')
-        status = project.get('status', 'active')
-        
-        # Format status indicator
-        if status == 'completed':
-            status_icon = "✅"
-        elif status == 'cancelled':
-            status_icon = "❌"
-        else:
-            status_icon = "📋"
-        
-        project_text = f"{status_icon} {_label(title, 45)}"
-        project_id = project.get('id', 0)
-        
-        kb.row(
-            InlineKeyboardButton(
-                text=project_text,
-                callback_data=f"edit:project:{project_id}",
-            )
-        )
-    
-    kb.row(InlineKeyboardButton(text="⬅️ Takaisin", callback_data="view:projects"))
-    return kb.as_markup()
+    return _projects_edit_kb(_project_rows_key(projects))
 
 
-def project_steps_edit_kb(project: dict, steps: list[dict]) -> InlineKeyboardMarkup:
+@lru_cache(maxsize=512)
+def _projects_edit_kb(project_rows: tuple[tuple[int, str, str], ...]) -> InlineKeyboardMarkup:
+    rows = [
+        [InlineKeyboardButton(
+            text=_project_button_text(status, title),
+            callback_data=f"edit:project:{project_id}",
+        )]
+        for project_id, status, title in project_rows
+    ]
+    rows.append([InlineKeyboardButton(text="⬅️ Takaisin", callback_data="view:projects")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def project_steps_edit_kb(project: dict, steps: list[dict], page: int = 0) -> InlineKeyboardMarkup:
     """Edit view: list of project steps with edit/delete/reorder options.
-    Undone steps: plain text. Done steps: ✅ and completion order number."""
-    kb = InlineKeyboardBuilder()
-    
-    project_id = project.get('id', 0)
-    ranks = _project_completion_ranks(steps)
-    
-    for step in steps:
-        step_id = step.get('id', 0)
-        step_text = step.get('text', '')
-        status = step.get('status', 'pending')
-        if status == 'completed':
-            rank = ranks.get(step_id, 0)
-            step_display = f"✅ {rank}. {_label(step_text, 40)}"
-        else:
-            step_display = _label(step_text, 40)
-        kb.row(
-            InlineKeyboardButton(
-                text=step_display,
-                callback_data=f"edit:step:menu:{step_id}",
-            )
-        )
+    Undone steps: plain text. Done steps: ✅ and completion order number.
+    Long projects are shown PROJECT_STEPS_PAGE_SIZE steps at a time with prev/next buttons."""
+    step_rows, page, page_count = _step_rows_page(steps, page)
+    return _project_steps_edit_kb(project.get('id', 0), step_rows, page, page_count)
+
+
+@lru_cache(maxsize=512)
+def _project_steps_edit_kb(
+    project_id: int,
+    step_rows: tuple[tuple[int, str, int | None], ...],
+    page: int,
+    page_count: int,
+) -> InlineKeyboardMarkup:
+    rows = [
+        [InlineKeyboardButton(
+            text=_step_button_text(text, rank),
+            callback_data=f"edit:step:menu:{step_id}",
+        )]
+        for step_id, text, rank in step_rows
+    ]
+    if page_count > 1:
+        rows.append(_step_page_nav(f"edit:step:page:{project_id}:", page, page_count))
     
     # Add step button
-    kb.row(InlineKeyboardButton(text="➕ Lisää tehtävä", callback_data=f"edit:step:add:{project_id}"))
+    rows.append([InlineKeyboardButton(text="➕ Lisää tehtävä", callback_data=f"edit:step:add:{project_id}")])
     
     # Reorder button
-    kb.row(InlineKeyboardButton(text="🔄 Järjestä uudelleen", callback_data=f"edit:step:reorder:{project_id}"))
+    rows.append([InlineKeyboardButton(text="🔄 Järjestä uudelleen", callback_data=f"edit:step:reorder:{project_id}")])
     
     # Rewrite project button
-    kb.row(InlineKeyboardButton(text="✏️ Uudelleenkirjoita projekti", callback_data=f"edit:project:rewrite:{project_id}"))
+    rows.append([InlineKeyboardButton(text="✏️ Uudelleenkirjoita projekti", callback_data=f"edit:project:rewrite:{project_id}")])
     
     # Delete project
-    kb.row(InlineKeyboardButton(text="🗑 Poista projekti", callback_data=f"edit:project:delete:{project_id}"))
+    rows.append([InlineKeyboardButton(text="🗑 Poista projekti", callback_data=f"edit:project:delete:{project_id}")])
     
     # Back button
-    kb.row(InlineKeyboardButton(text="⬅️ Takaisin", callback_data="edit:projects"))
+    rows.append([InlineKeyboardButton(text="⬅️ Takaisin", callback_data="edit:projects")])
     
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
 def render_project_steps_edit_header(project: dict, steps: list[dict]) -> str:
@@ -1022,12 +1048,7 @@ def render_project_steps_edit_header(project: dict, steps: list[dict]) -> str:
     total_steps = len(steps)
     completed_count = sum(1 for s in steps if s.get('status') == 'completed')
 
-    lines = [f"📋 {project_title}", ""]
-    lines.append(f"Askeleita: {completed_count}/{total_steps} valmiina")
-    lines.append("")
-    lines.append("Klikkaa askelta muokataksesi sitä.")
-
-    return "\n".join(lines)
+    return f"📋 {project_title}\n\nAskeleita: {completed_count}/{total_steps} valmiina\n\nKlikkaa askelta muokataksesi sitä."
 
 
 def render_routine_list_edit_header(routine_type: str) -> str:
@@ -1036,21 +1057,35 @@ def render_routine_list_edit_header(routine_type: str) -> str:
     return f"{label} – tehtävät\n\nValitse tehtävä muokataksesi tai lisää uusi."
 
 
+def _routine_list_edit_footer(routine_type: str) -> list[list[InlineKeyboardButton]]:
+    return [
+        [InlineKeyboardButton(text="➕ Lisää tehtävä", callback_data=f"routine:add:{routine_type}")],
+        [InlineKeyboardButton(text="⬅️ Takaisin", callback_data="settings:routines:edit_menu")],
+    ]
+
+
+@lru_cache(maxsize=None)
+def _empty_routine_list_edit_kb(routine_type: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=_routine_list_edit_footer(routine_type))
+
+
 def routine_list_edit_kb(routine_type: str, tasks: list[dict]) -> InlineKeyboardMarkup:
     """Edit view: list of routine tasks (click to edit), add, back."""
-    kb = InlineKeyboardBuilder()
+    if not tasks:
+        # Fresh routine: only the footer, shared per routine type
+        return _empty_routine_list_edit_kb(routine_type)
+    rows: list[list[InlineKeyboardButton]] = []
     for task in tasks:
         task_text = _label(task.get("text", ""), 48)
         task_id = task.get("id", 0)
-        kb.row(
+        rows.append([
             InlineKeyboardButton(
                 text=task_text,
                 callback_data=f"routine:edit_task:{routine_type}:{task_id}",
             )
-        )
-    kb.row(InlineKeyboardButton(text="➕ Lisää tehtävä", callback_data=f"routine:add:{routine_type}"))
-    kb.row(InlineKeyboardButton(text="⬅️ Takaisin", callback_data="settings:routines:edit_menu"))
-    return kb.as_markup()
+        ])
+    rows += _routine_list_edit_footer(routine_type)
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
 def render_routine_active_header(routine_type: str, all_done: bool) -> str:
@@ -1061,6 +1096,29 @@ def render_routine_active_header(routine_type: str, all_done: bool) -> str:
     return f"{label}\n\nMerkitse tehtävät tehdyiksi tai kuittaa rutiini lopuksi."
 
 
+def _routine_active_footer(routine_type: str, all_done: bool) -> list[list[InlineKeyboardButton]]:
+    rows: list[list[InlineKeyboardButton]] = []
+    if all_done:
+        rows.append([
+            InlineKeyboardButton(
+                text="Kuittaa tehdyksi",
+                callback_data=f"routine:quitted:{routine_type}",
+            )
+        ])
+    rows.append([
+        InlineKeyboardButton(
+            text="✏️ Muokkaa listaa",
+            callback_data=f"routine:edit_list:{routine_type}",
+        )
+    ])
+    return rows
+
+
+@lru_cache(maxsize=None)
+def _empty_routine_active_kb(routine_type: str, all_done: bool) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=_routine_active_footer(routine_type, all_done))
+
+
 def routine_active_kb(
     routine_type: str,
     tasks: list[dict],
@@ -1068,64 +1126,53 @@ def routine_active_kb(
     all_done: bool,
 ) -> InlineKeyboardMarkup:
     """Active routine view: one button per task (toggle done), optionally 'Kuittaa tehdyksi', Muokkaa listaa."""
-    kb = InlineKeyboardBuilder()
+    if not tasks:
+        # No routine tasks yet: only the footer, shared per (routine type, all_done)
+        return _empty_routine_active_kb(routine_type, all_done)
+    rows: list[list[InlineKeyboardButton]] = []
     for task in tasks:
         task_id = task.get("id", 0)
         task_text = _label(task.get("text", ""), 48)
         is_done = task_id in completed
         prefix = "✅ " if is_done else "☐ "
-        kb.row(
+        rows.append([
             InlineKeyboardButton(
                 text=f"{prefix}{task_text}",
                 callback_data=f"routine:toggle:{routine_type}:{task_id}",
             )
-        )
-    if all_done:
-        kb.row(
-            InlineKeyboardButton(
-                text="Kuittaa tehdyksi",
-                callback_data=f"routine:quitted:{routine_type}",
-            )
-        )
-    kb.row(
-        InlineKeyboardButton(
-            text="✏️ Muokkaa listaa",
-            callback_data=f"routine:edit_list:{routine_type}",
-        )
-    )
-    return kb.as_markup()
+        ])
+    rows += _routine_active_footer(routine_type, all_done)
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-def step_edit_menu_kb(step: dict, project_id: int) -> InlineKeyboardMarkup:
-    """Edit menu for a single step"""
-    kb = InlineKeyboardBuilder()
-    
+def step_edit_menu_kb(step: dict, project_id: int, page: int = 0) -> InlineKeyboardMarkup:
+    """Edit menu for a single step; back returns to the steps edit page the step is on"""
     step_id = step.get('id', 0)
     status = step.get('status', 'pending')
     
     # Edit text
-    kb.row(InlineKeyboardButton(text="✏️ Muuta tekstiä", callback_data=f"edit:step:text:{step_id}"))
+    rows = [[InlineKeyboardButton(text="✏️ Muuta tekstiä", callback_data=f"edit:step:text:{step_id}")]]
     
     # Status actions
     if status == 'pending':
-        kb.row(InlineKeyboardButton(text="▶️ Aktivoi", callback_data=f"edit:step:activate:{step_id}"))
+        rows.append([InlineKeyboardButton(text="▶️ Aktivoi", callback_data=f"edit:step:activate:{step_id}")])
     elif status == 'active':
-        kb.row(InlineKeyboardButton(text="✅ Merkitse tehdyksi", callback_data=f"edit:step:complete:{step_id}"))
-        kb.row(InlineKeyboardButton(text="⏸️ Palauta odottamaan", callback_data=f"edit:step:deactivate:{step_id}"))
+        rows.append([InlineKeyboardButton(text="✅ Merkitse tehdyksi", callback_data=f"edit:step:complete:{step_id}")])
+        rows.append([InlineKeyboardButton(text="⏸️ Palauta odottamaan", callback_data=f"edit:step:deactivate:{step_id}")])
     elif status == 'completed':
-        kb.row(InlineKeyboardButton(text="⏸️ Palauta odottamaan", callback_data=f"edit:step:deactivate:{step_id}"))
+        rows.append([InlineKeyboardButton(text="⏸️ Palauta odottamaan", callback_data=f"edit:step:deactivate:{step_id}")])
     
     # Move up/down
-    kb.row(
+    rows.append([
         InlineKeyboardButton(text="⬆️ Siirrä ylös", callback_data=f"edit:step:move_up:{step_id}"),
         InlineKeyboardButton(text="⬇️ Siirrä alas", callback_data=f"edit:step:move_down:{step_id}"),
-        width=2,
-    )
+    ])
     
     # Delete step (poista tehtävä)
-    kb.row(InlineKeyboardButton(text="🗑 Poista tehtävä", callback_data=f"edit:step:delete:{step_id}"))
+    rows.append([InlineKeyboardButton(text="🗑 Poista tehtävä", callback_data=f"edit:step:delete:{step_id}")])
     
     # Back to steps list
-    kb.row(InlineKeyboardButton(text="⬅️ Takaisin", callback_data=f"edit:project:{project_id}"))
+    back = f"edit:step:page:{project_id}:{page}" if page else f"edit:project:{project_id}"
+    rows.append([InlineKeyboardButton(text="⬅️ Takaisin", callback_data=back)])
     
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=rows)
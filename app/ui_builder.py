@@ -5,10 +5,12 @@ Shared keyboard builder: ButtonSpec and build_kb for inline keyboards.
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Sequence
 
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+# Telegram/aiogram limit for buttons in one inline keyboard row
+MAX_ROW_WIDTH = 8
 
 
 @dataclass
@@ -20,19 +22,19 @@ class ButtonSpec:
 
 
 def build_kb(
-    rows: list[list[ButtonSpec]],
-    row_widths: Optional[list[int]] = None,
+    rows: Sequence[Sequence[ButtonSpec]],
+    row_widths: Optional[Sequence[Optional[int]]] = None,
 ) -> InlineKeyboardMarkup:
     """
-    Build InlineKeyboardMarkup from rows of ButtonSpec.
+    Build InlineKeyboardMarkup from rows of ButtonSpec (lists or tuples).
     row_widths[i] = width for row i (e.g. 5 for five buttons in one row); None = default (one per row or pack).
     """
-    kb = InlineKeyboardBuilder()
+    keyboard: list[list[InlineKeyboardButton]] = []
     for i, row in enumerate(rows):
         buttons = [InlineKeyboardButton(text=b.text, callback_data=b.callback_data) for b in row]
         w = row_widths[i] if row_widths and i < len(row_widths) else None
-        if w is not None:
-            kb.row(*buttons, width=w)
-        else:
-            kb.row(*buttons)
-    return kb.as_markup()
+        if w is None:
+            w = MAX_ROW_WIDTH
+        # Same splitting as InlineKeyboardBuilder.row(): rows longer than w wrap
+        keyboard.extend(buttons[pos:pos + w] for pos in range(0, len(buttons), w))
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
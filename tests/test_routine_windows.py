@@ -74,8 +74,8 @@ def test_get_routine_windows_returns_defaults_when_user_has_no_settings():
         try:
             repo = TasksRepo(path)
             await repo.init()
-            # User 999 has no row in user_settings; get_routine_windows uses get_user_settings
-            # which creates a row with NULL for the 4 window columns -> defaults applied
+            # User 999 has no row in user_settings; get_user_settings returns the defaults
+            # with NULL for the 4 window columns -> default windows applied
             windows = await repo.get_routine_windows(999)
             assert windows["morning_start"] == DEFAULT_MORNING_START
             assert windows["morning_end"] == DEFAULT_MORNING_END
@@ -100,7 +100,6 @@ def test_set_morning_window_rejects_start_ge_end():
             repo = TasksRepo(path)
             await repo.init()
             user_id = 1
-            # Ensure user has a row (get_user_settings creates it)
             await repo.get_user_settings(user_id)
             # end before start
             ok = await repo.set_morning_window(user_id, "07:30", "05:30")
@@ -173,6 +172,36 @@ def test_is_in_morning_window_boundaries():
     asyncio.run(run())
 
 
+def test_routine_window_flags():
+    """routine_window_flags returns (in_morning, in_evening) from one settings fetch; overlapping windows give both."""
+    async def run():
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
+            path = f.name
+        try:
+            repo = TasksRepo(path)
+            await repo.init()
+            user_id = 1
+            await repo.get_user_settings(user_id)
+
+            with patch.object(SystemClock, "now_user_tz") as mock_now:
+                mock_now.return_value = datetime(2025, 2, 3, 6, 0)
+                assert await repo.routine_window_flags(user_id) == (True, False)
+                mock_now.return_value = datetime(2025, 2, 3, 12, 0)
+                assert await repo.routine_window_flags(user_id) == (False, False)
+                mock_now.return_value = datetime(2025, 2, 3, 21, 0)
+                assert await repo.routine_window_flags(user_id) == (False, True)
+
+                # Overlapping windows: both flags set, so the handler can still fall through to evening
+                assert await repo.set_morning_window(user_id, "19:00", "23:00") is True
+                assert await repo.set_evening_window(user_id, "20:00", "22:00") is True
+                assert await repo.routine_window_flags(user_id) == (True, True)
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    asyncio.run(run())
+
+
 if __name__ == "__main__":
     test_time_in_window_boundary_start_inclusive()
     test_time_in_window_boundary_just_before_end_inclusive()
@@ -186,5 +215,6 @@ if __name__ == "__main__":
     test_set_morning_window_rejects_start_ge_end()
     test_set_evening_window_rejects_start_ge_end()
     test_is_in_morning_window_boundaries()
+    test_routine_window_flags()
     print("All tests passed.")
     sys.exit(0)
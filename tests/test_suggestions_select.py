@@ -0,0 +1,93 @@
+"""
+Unit tests for the deterministic suggestion selector (app.suggestions).
+"""
+from datetime import datetime, timedelta, timezone
+
+from app.suggestions import SMALL_BACKLOG_SIZE, score_suggestion, select_suggestions
+
+NOW = datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _iso(days_ago: float) -> str:
+    return (NOW - timedelta(days=days_ago)).isoformat()
+
+
+def test_score_suggestion_age_buckets():
+    """Recent events get no age bonus, 30-365 days a linear bonus, 365+ a flat +2."""
+    base = dict(task_text="t", priority=0, deleted_at=None, has_deadline=True, has_schedule=False, now=NOW)
+    assert score_suggestion(completed_at=_iso(5), **base) == 0.0
+    assert score_suggestion(completed_at=_iso(60), **base) == 10.0
+    assert score_suggestion(completed_at=_iso(400), **base) == 2.0
+
+
+def test_score_suggestion_accepts_z_suffix_and_naive_timestamps():
+    """'Z' suffix and naive timestamps are both treated as UTC."""
+    base = dict(task_text="t", priority=0, deleted_at=None, has_deadline=True, has_schedule=False, now=NOW)
+    z = (NOW - timedelta(days=60)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    naive = (NOW - timedelta(days=60)).replace(tzinfo=None).isoformat()
+    assert score_suggestion(completed_at=z, **base) == 10.0
+    assert score_suggestion(completed_at=naive, **base) == 10.0
+    assert score_suggestion(completed_at="not a date", **base) == 0.0
+
+
+def test_score_suggestion_priority_metadata_and_deleted_bonus():
+    """priority*10, +3 without deadline/schedule, +2 for deleted."""
+    score = score_suggestion(
+        task_text="t", priority=2, completed_at=None, deleted_at=_iso(1),
+        has_deadline=False, has_schedule=False, now=NOW,
+    )
+    assert score == 25.0
+
+
+def test_select_suggestions_orders_by_score_and_limits():
+    """Highest score first, at most max_suggestions, clean text and event metadata kept."""
+    completed = [
+        {"id": 1, "text": "Old task", "at": _iso(90)},
+        {"id": 2, "text": "Urgent!!", "at": _iso(1)},
+        {"id": 3, "text": "", "at": _iso(1)},
+    ]
+    deleted = [{"id": 4, "text": "Removed | Syy: x", "at": _iso(2), "priority": None}]
+    result = select_suggestions(completed, deleted, now=NOW, max_suggestions=2)
+    assert [s["event_id"] for s in result] == [2, 1]
+    assert result[0]["text"] == "Urgent"
+    assert result[0]["priority"] == 2
+    assert result[0]["event_type"] == "completed"
+    assert result[0]["event_at"] == _iso(1)
+    assert set(result[0]) == {"text", "priority", "event_id", "event_type", "event_at", "score"}
+
+
+def test_select_suggestions_uses_job_id_title_and_tie_break():
+    """Falls back to title/job_id/updated_at; equal scores tie-break on event_at ascending."""
+    completed = [
+        {"job_id": 10, "title": "B", "updated_at": _iso(3), "deadline": "x"},
+        {"job_id": 11, "title": "A", "updated_at": _iso(4), "deadline": "x"},
+    ]
+    deleted = [{"id": 12, "text": "C", "at": _iso(5), "schedule_kind": "none", "deadline": "x"}]
+    result = select_suggestions(completed, deleted, now=NOW)
+    assert [s["event_id"] for s in result] == [12, 11, 10]
+    assert result[0]["event_type"] == "deleted"
+    assert select_suggestions([], [], now=NOW) == []
+
+
+def test_select_suggestions_string_age_fast_path_matches_parsing():
+    """Stored UTC '+00:00' timestamps score the same via the string thresholds as via parsing."""
+    for days in (0.5, 29.9, 30, 45, 364.9, 365, 500):
+        completed = [{"id": 1, "text": "t", "at": _iso(days), "deadline": "x"}]
+        expected = score_suggestion(
+            task_text="t", priority=0, completed_at=_iso(days), deleted_at=None,
+            has_deadline=True, has_schedule=False, now=NOW,
+        )
+        assert select_suggestions(completed, [], now=NOW)[0]["score"] == expected
+
+
+def test_select_suggestions_large_backlog_matches_small_path():
+    """Backlogs above SMALL_BACKLOG_SIZE (heap path) pick the same items as a full sort."""
+    completed = [
+        {"id": i, "text": "t" + "!" * (i % 4), "at": _iso(i % 50), "deadline": "x"}
+        for i in range(SMALL_BACKLOG_SIZE * 2)
+    ]
+    expected = sorted(
+        (select_suggestions([c], [], now=NOW)[0] for c in completed),
+        key=lambda s: (-s["score"], s["event_at"]),
+    )[:7]
+    assert select_suggestions(completed, [], now=NOW) == expected
@@ -0,0 +1,250 @@
+"""
+Unit tests for inline keyboard builders in app.ui.
+"""
+import ast
+import asyncio
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from app.db import EventTaskRow, TasksRepo
+from app.ui import (
+    date_picker_kb,
+    deleted_tasks_kb,
+    done_tasks_kb,
+    project_detail_view_kb,
+    project_step_page,
+    project_steps_edit_kb,
+    projects_list_kb,
+    routine_active_kb,
+    routine_list_edit_kb,
+    settings_kb,
+    stats_menu_kb,
+    suggestions_kb,
+    task_edit_menu_kb,
+    time_picker_kb,
+)
+
+
+def _callbacks(markup) -> list[str]:
+    return [b.callback_data for row in markup.inline_keyboard for b in row]
+
+
+def test_static_keyboards_are_cached():
+    """Static keyboards return one shared markup; settings_kb is cached per toggle state."""
+    assert stats_menu_kb() is stats_menu_kb()
+    assert settings_kb(True, False, False) is settings_kb(True, False, False)
+    assert settings_kb(True, False, False) is not settings_kb(False, False, False)
+
+
+
+_APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+_LIST_MUTATORS = {"append", "extend", "insert", "pop", "remove", "clear", "sort", "reverse"}
+_BUTTON_FIELDS = {"inline_keyboard", "text", "callback_data", "url"}
+
+
+def _reaches_inline_keyboard(node: ast.AST) -> bool:
+    """True if an attribute/subscript chain goes through .inline_keyboard (kb.inline_keyboard[0][1]...)."""
+    while isinstance(node, (ast.Attribute, ast.Subscript)):
+        if isinstance(node, ast.Attribute) and node.attr == "inline_keyboard":
+            return True
+        node = node.value
+    return False
+
+
+def _in_place_markup_edits(tree: ast.AST) -> list[int]:
+    lines = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+            if node.func.attr in _LIST_MUTATORS and _reaches_inline_keyboard(node.func.value):
+                lines.append(node.lineno)
+        targets = []
+        if isinstance(node, (ast.Assign, ast.Delete)):
+            targets = node.targets
+        elif isinstance(node, (ast.AugAssign, ast.AnnAssign)):
+            targets = [node.target]
+        for target in targets:
+            if isinstance(target, ast.Subscript) and _reaches_inline_keyboard(target):
+                lines.append(node.lineno)
+            elif (
+                isinstance(target, ast.Attribute)
+                and target.attr in _BUTTON_FIELDS
+                and not (isinstance(target.value, ast.Name) and target.value.id == "self")
+            ):
+                lines.append(node.lineno)
+    return lines
+
+
+def test_no_in_place_keyboard_mutation():
+    """Cached keyboards are shared by every user, and aiogram markups/buttons are not frozen:
+    no code in app/ may change a markup or button after building it."""
+    offenders = []
+    for root, _dirs, files in os.walk(_APP_DIR):
+        for name in files:
+            if name.endswith(".py"):
+                path = os.path.join(root, name)
+                with open(path, encoding="utf-8") as f:
+                    tree = ast.parse(f.read(), filename=path)
+                offenders += [f"{os.path.relpath(path, _APP_DIR)}:{line}" for line in _in_place_markup_edits(tree)]
+    assert offenders == []
+    # The checker itself must catch the patterns it is there for
+    sample = ast.parse("kb.inline_keyboard.append(row)\nkb.inline_keyboard[0][0].text = 'x'\nbtn.callback_data = 'y'")
+    assert sorted(_in_place_markup_edits(sample)) == [1, 2, 3]
+
+def test_settings_kb_toggle_texts():
+    """Toggle rows reflect the passed settings; callbacks stay the same."""
+    on = settings_kb(True, True, True)
+    off = settings_kb(False, False, False)
+    assert _callbacks(on) == _callbacks(off)
+    assert on.inline_keyboard[1][0].text.startswith("✅")
+    assert off.inline_keyboard[1][0].text.startswith("❌")
+    assert off.inline_keyboard[2][0].text == "❌ Aamurutiinit pois"
+
+
+def test_date_picker_kb_shared_per_day_and_prefix():
+    """Date picker is reused for the same prefix/day and labels the next days by weekday."""
+    kb = date_picker_kb("deadline:date")
+    assert kb is date_picker_kb("deadline:date")
+    assert kb is not date_picker_kb("schedule:date")
+    assert kb.inline_keyboard[0][0].callback_data == "deadline:date:none"
+    day = datetime.now(timezone.utc) + timedelta(days=2)
+    assert kb.inline_keyboard[2][0].text == f"{day.strftime('%a')} {day.day}"
+    assert kb.inline_keyboard[2][0].callback_data == "deadline:date:2"
+    no_none = date_picker_kb("schedule:date", include_none=False)
+    assert no_none.inline_keyboard[0][0].callback_data == "schedule:date:0"
+
+
+def test_done_and_deleted_kb_from_repo_rows():
+    """list_done_tasks/list_deleted_tasks return EventTaskRow rows that the list keyboards render."""
+    async def run():
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
+            path = f.name
+        try:
+            repo = TasksRepo(path)
+            await repo.init()
+            done_id = await repo.add_task(1, "Done me!")
+            gone_id = await repo.add_task(1, "Delete me")
+            assert await repo.complete_task(1, done_id)
+            assert await repo.delete_task_with_log(1, gone_id)
+            return await repo.list_done_tasks(1), await repo.list_deleted_tasks(1)
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    done, deleted = asyncio.run(run())
+    assert [type(r) for r in done + deleted] == [EventTaskRow, EventTaskRow]
+    assert done[0].title == "Done me" and done[0].updated_at
+    done_button = done_tasks_kb(done).inline_keyboard[0][0]
+    assert done_button.text.startswith("✓ Done me (")
+    assert done_button.callback_data == f"done:restore:{done[0].event_id}"
+    deleted_button = deleted_tasks_kb(deleted).inline_keyboard[0][0]
+    assert deleted_button.callback_data == f"deleted:restore:{deleted[0].event_id}"
+
+
+def test_task_edit_menu_kb_cached_per_id_and_deadline():
+    """The edit menu is shared per (task id, has deadline); only tasks with a deadline get 'Poista DL'."""
+    class _T:
+        def __init__(self, id, deadline):
+            self.id, self.deadline = id, deadline
+
+    with_dl = task_edit_menu_kb(_T(5, "2025-01-01T10:00:00+00:00"))
+    assert with_dl is task_edit_menu_kb(_T(5, "2025-02-02T10:00:00+00:00"))
+    without_dl = task_edit_menu_kb(_T(5, None))
+    assert "task:dl_remove:5" in _callbacks(with_dl)
+    assert "task:dl_remove:5" not in _callbacks(without_dl)
+    assert "task:del:6" in _callbacks(task_edit_menu_kb(_T(6, None)))
+
+
+def test_suggestions_kb_truncates_after_priority_markers():
+    """Long titles are cut once, after the '!' markers are appended; short ones keep them."""
+    kb = suggestions_kb([
+        {"event_id": 1, "text": "x" * 60, "priority": 2},
+        {"event_id": 2, "text": "Short", "priority": 2},
+        {"event_id": None, "text": "No event"},
+    ])
+    assert kb.inline_keyboard[0][0].text == "x" * 40 + "…"
+    assert kb.inline_keyboard[2][0].text == "Short!!"
+    assert _callbacks(kb)[-1] == "home:home"
+    assert len(kb.inline_keyboard) == 5
+
+
+def test_project_keyboards_rebuilt_only_when_rendered_fields_change():
+    """Equal project/step lists share one markup; a status or done_at change yields a new one."""
+    projects = [{"id": 1, "title": "Remontti", "status": "active"}]
+    kb = projects_list_kb(projects)
+    assert kb is projects_list_kb([dict(projects[0], updated_at="2025-01-01")])
+    done = projects_list_kb([dict(projects[0], status="completed")])
+    assert done is not kb and done.inline_keyboard[1][0].text == "✅ Remontti"
+
+    steps = [
+        {"id": 1, "text": "A", "status": "completed", "done_at": "2025-01-02"},
+        {"id": 2, "text": "B", "status": "completed", "done_at": "2025-01-01"},
+    ]
+    kb = project_steps_edit_kb({"id": 7}, steps)
+    assert kb is project_steps_edit_kb({"id": 7}, [dict(s) for s in steps])
+    assert [row[0].text for row in kb.inline_keyboard[:2]] == ["✅ 2. A", "✅ 1. B"]
+    steps[0]["done_at"] = "2024-12-31"
+    reordered = project_steps_edit_kb({"id": 7}, steps)
+    assert [row[0].text for row in reordered.inline_keyboard[:2]] == ["✅ 1. A", "✅ 2. B"]
+    assert "edit:step:add:8" in _callbacks(project_steps_edit_kb({"id": 8}, steps))
+
+
+def test_empty_routine_keyboards_are_shared_footers():
+    """With no routine tasks only the footer is shown, and that markup is built once."""
+    empty = routine_active_kb("morning", [], set(), False)
+    assert empty is routine_active_kb("morning", [], {3}, False)
+    assert _callbacks(empty) == ["routine:edit_list:morning"]
+    assert _callbacks(routine_active_kb("morning", [], set(), True)) == [
+        "routine:quitted:morning",
+        "routine:edit_list:morning",
+    ]
+    full = routine_active_kb("morning", [{"id": 3, "text": "Kahvi"}], {3}, True)
+    assert _callbacks(full) == ["routine:toggle:morning:3", "routine:quitted:morning", "routine:edit_list:morning"]
+    assert full.inline_keyboard[0][0].text == "✅ Kahvi"
+
+    assert routine_list_edit_kb("evening", []) is routine_list_edit_kb("evening", [])
+    assert _callbacks(routine_list_edit_kb("evening", [])) == ["routine:add:evening", "settings:routines:edit_menu"]
+
+
+def test_project_detail_view_kb_pages_long_projects():
+    """Projects with more than PROJECT_STEPS_PAGE_SIZE steps get prev/next rows; short ones do not."""
+    steps = [{"id": i, "text": f"Step {i}", "status": "pending"} for i in range(1, 46)]
+    first = project_detail_view_kb({"id": 3}, steps)
+    assert _callbacks(first)[:2] == ["proj:step:toggle:1", "proj:step:toggle:2"]
+    assert _callbacks(first)[20:] == ["noop", "proj:page:3:1", "view:projects"]
+    last = project_detail_view_kb({"id": 3}, steps, page=2)
+    assert _callbacks(last) == [f"proj:step:toggle:{i}" for i in range(41, 46)] + [
+        "proj:page:3:1", "noop", "view:projects",
+    ]
+    assert last.inline_keyboard[5][1].text == "3/3"
+    assert project_detail_view_kb({"id": 3}, steps, page=99) is last
+    assert project_step_page(steps, 41) == 2 and project_step_page(steps, 999) == 0
+    assert "noop" not in _callbacks(project_detail_view_kb({"id": 3}, steps[:20]))
+
+
+
+def test_project_steps_edit_kb_pages_long_projects():
+    """The steps edit keyboard pages like the detail view and keeps its action rows on every page."""
+    steps = [{"id": i, "text": f"Step {i}", "status": "pending"} for i in range(1, 46)]
+    actions = [
+        "edit:step:add:3", "edit:step:reorder:3", "edit:project:rewrite:3",
+        "edit:project:delete:3", "edit:projects",
+    ]
+    first = project_steps_edit_kb({"id": 3}, steps)
+    assert _callbacks(first) == [f"edit:step:menu:{i}" for i in range(1, 21)] + [
+        "noop", "edit:step:page:3:1",
+    ] + actions
+    middle = project_steps_edit_kb({"id": 3}, steps, page=1)
+    assert _callbacks(middle)[20:23] == ["edit:step:page:3:0", "noop", "edit:step:page:3:2"]
+    last = project_steps_edit_kb({"id": 3}, steps, page=99)
+    assert _callbacks(last)[:5] == [f"edit:step:menu:{i}" for i in range(41, 46)]
+    assert last.inline_keyboard[5][1].text == "3/3"
+    assert "noop" not in _callbacks(project_steps_edit_kb({"id": 3}, steps[:20]))
+
+def test_time_picker_kb_cached_per_prefix():
+    """Six prefixes are used across deadline/schedule flows; each keyboard is built once."""
+    kb = time_picker_kb("schedule:start")
+    assert kb is time_picker_kb("schedule:start")
+    assert time_picker_kb("deadline:time") is not kb
+    assert _callbacks(kb)[0] == "schedule:start:09:00"
+    assert _callbacks(kb)[-1] == "schedule:start:back"
@@ -0,0 +1,71 @@
+"""
+Unit tests for user_settings toggles.
+
+Run with: python -m pytest tests/test_user_settings.py -v
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+
+from app.db import TasksRepo
+
+
+def _run_with_repo(body):
+    async def run():
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
+            path = f.name
+        try:
+            repo = TasksRepo(path)
+            await repo.init()
+            await body(repo)
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    asyncio.run(run())
+
+
+def test_toggle_show_done_in_home_without_row_starts_from_default():
+    """No settings row: default is True, so the first toggle returns False."""
+    async def body(repo):
+        assert await repo.toggle_show_done_in_home(1) is False
+        assert await repo.toggle_show_done_in_home(1) is True
+        settings = await repo.get_user_settings(1)
+        assert settings["show_done_in_home"] is True
+
+    _run_with_repo(body)
+
+
+def test_toggle_routines_enabled_flips_existing_row():
+    """Existing row with defaults: routines toggles go 0 -> 1 -> 0 and persist."""
+    async def body(repo):
+        await repo.get_user_settings(1)
+        assert await repo.toggle_morning_routines_enabled(1) is True
+        assert (await repo.get_user_settings(1))["morning_routines_enabled"] is True
+        assert await repo.toggle_evening_routines_enabled(1) is True
+        assert await repo.toggle_evening_routines_enabled(1) is False
+        settings = await repo.get_user_settings(1)
+        assert settings["morning_routines_enabled"] is True
+        assert settings["evening_routines_enabled"] is False
+
+    _run_with_repo(body)
+
+
+def test_get_user_settings_cache_is_invalidated_by_mutators():
+    """Cached settings are served until a mutator writes, then re-read from the DB."""
+    async def body(repo):
+        first = await repo.get_user_settings(1)
+        assert first["timezone"] == "Europe/Helsinki"
+        # Mutating the returned dict must not leak into the cache
+        first["timezone"] = "UTC"
+        assert (await repo.get_user_settings(1))["timezone"] == "Europe/Helsinki"
+        await repo.set_user_timezone(1, "America/New_York")
+        assert (await repo.get_user_settings(1))["timezone"] == "America/New_York"
+        await repo.set_morning_window(1, "06:00", "08:00")
+        assert (await repo.get_user_settings(1))["morning_start_time"] == "06:00"
+        await repo.set_user_time_window(1, day_start_time="07:00")
+        assert (await repo.get_user_settings(1))["day_start_time"] == "07:00"
+
+    _run_with_repo(body)